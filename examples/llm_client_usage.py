@@ -10,7 +10,9 @@ import os
 # Добавляем путь к src
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from llm_client import PerplexityClient, LocalLLMClient
+import asyncio
+
+from llm_client import PerplexityClient, AsyncPerplexityClient, LocalLLMClient
 
 
 def example_perplexity():
@@ -203,6 +205,38 @@ def example_clear_and_update():
         print(f"❌ Ошибка: {e}")
 
 
+def example_async_batch():
+    """Пример конкурентной отправки независимых сообщений."""
+    print("=" * 60)
+    print("Пример 6: Конкурентная отправка (asyncio)")
+    print("=" * 60)
+
+    client = AsyncPerplexityClient(
+        api_key="your-api-key-here",
+        system_prompt="Ты полезный ассистент. Отвечай кратко и по делу."
+    )
+
+    # Независимые вопросы уходят одновременно: N запросов занимают ~1 RTT
+    questions = [
+        "Что такое HTTP keep-alive?",
+        "Что такое RAG?",
+        "Что такое MCP?"
+    ]
+
+    async def run():
+        try:
+            responses = await client.abatch_messages(questions)
+            for question, response in zip(questions, responses):
+                print(f"\n👤 User: {question}")
+                print(f"🤖 Assistant: {response[:100]}...")
+        except Exception as e:
+            print(f"❌ Ошибка: {e}")
+        finally:
+            await AsyncPerplexityClient.aclose()
+
+    asyncio.run(run())
+
+
 def main():
     """Главная функция с меню."""
     print("\n" + "=" * 60)
@@ -215,6 +249,7 @@ def main():
         "3": ("Диалог", example_conversation),
         "4": ("Tool result", example_tool_result),
         "5": ("Управление историей", example_clear_and_update),
+        "6": ("Конкурентная отправка", example_async_batch),
     }
     
     print("\nВыберите пример:")
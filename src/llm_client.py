@@ -6,31 +6,237 @@
 - Локальные модели через Ollama (qwen3:8b и другие)
 """
 
+import asyncio
+import gzip
+import importlib.util
 import json
-import requests
-from typing import List, Dict, Any
-from abc import ABC, abstractmethod
+import re
+import sys
+import threading
+import time
 
+from typing import List, Dict, Any, Deque, Generator, Protocol
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-class BaseLLMClient(ABC):
+
+def _lazy_import(name: str):
     """
-    Базовый абстрактный класс для LLM клиентов.
-    
-    Определяет общий интерфейс для всех реализаций.
+    Ленивая загрузка модуля: тело модуля исполняется при первом
+    обращении к атрибуту, а не при импорте.
+
+    requests тянет за собой urllib3/charset_normalizer/certifi/idna —
+    сотни миллисекунд холодного старта, которые не нужны, пока клиент
+    реально не создан.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+requests = _lazy_import("requests")
+
+try:
+    import httpx
+except ImportError:
+    # httpx — опциональная зависимость, нужна только для async клиента
+    httpx = None
+
+try:
+    import orjson
+except ImportError:
+    # orjson — опциональное ускорение JSON сериализации
+    orjson = None
+
+
+def _dumps_bytes(obj: Any) -> bytes:
+    """
+    Сериализация объекта в JSON bytes.
+
+    Использует orjson если установлен (C-уровневый обход структуры),
+    иначе stdlib json. Кириллица не экранируется в обоих случаях.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+# Тела меньше этого порога не сжимаем: выигрыш не окупает CPU
+_GZIP_THRESHOLD = 1024
+
+
+def _compress_body(body: bytes) -> tuple:
+    """
+    Gzip-сжатие тела запроса, если оно достаточно большое.
+
+    JSON длинных историй сжимается в 5-10 раз, что заметно сокращает
+    upload на WAN соединениях.
+
+    Args:
+        body: Сериализованное JSON тело
+
+    Returns:
+        Кортеж (тело, доп. заголовки или None)
+    """
+    if len(body) > _GZIP_THRESHOLD:
+        return gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"}
+    return body, None
+
+
+def _loads_bytes(data: bytes) -> Any:
+    """
+    Парсинг JSON из raw bytes ответа.
+
+    Использует orjson если установлен, иначе stdlib json. Работа с
+    bytes напрямую избегает лишнего декодирования в str.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class LLMClientProtocol(Protocol):
+    """
+    Протокол LLM клиента для статической типизации.
+
+    Любой объект с send_message/send_tool_result подходит — без
+    привязки к иерархии наследования.
+    """
+
+    def send_message(self, message: str) -> str: ...
+
+    def send_tool_result(self, tool_name: str, result: Any) -> str: ...
+
+
+class BaseLLMClient:
     """
+    Базовый класс для LLM клиентов.
+
+    Определяет общий интерфейс для всех реализаций. Подклассы обязаны
+    переопределить send_message и send_tool_result.
+
+    Инвариант истории: сообщения только дописываются в конец
+    (_append_message); прошлые ходы байт-в-байт стабильны между
+    запросами, чтобы серверный KV/prompt-кэш префикса оставался
+    тёплым. Префикс меняют только clear_history, set_system_prompt
+    и обрезка контекста при переполнении.
+    """
+
+    __slots__ = (
+        "_system_prompt", "_max_context_tokens", "_messages",
+        "_msg_frags", "_msg_tokens", "_history_version",
+        "_history_snapshot", "_history_snapshot_version", "_session",
+    )
     
-    def __init__(self, system_prompt: str) -> None:
+    # Примерная оценка: ~4 символа на токен
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, system_prompt: str,
+                 max_context_tokens: int = 6000) -> None:
         """
         Инициализация клиента.
-        
+
         Args:
             system_prompt: Системный промпт для модели
+            max_context_tokens: Бюджет токенов на контекст; при превышении
+                старейшие не-системные сообщения выбрасываются
         """
         self._system_prompt = system_prompt
+        self._max_context_tokens = max_context_tokens
         self._messages: List[Dict[str, str]] = []
-        self._messages.append({"role": "system", "content": system_prompt})
-    
-    @abstractmethod
+        # Пре-сериализованные JSON фрагменты сообщений: тело запроса
+        # собирается склейкой, без повторной сериализации всей истории
+        self._msg_frags: Deque[bytes] = deque()
+        # Кэш оценок токенов по сообщениям (та же индексация)
+        self._msg_tokens: Deque[int] = deque()
+        # Счетчик изменений истории и кэш immutable-снимка для messages_view
+        self._history_version: int = 0
+        self._history_snapshot: tuple = ()
+        self._history_snapshot_version: int = -1
+        self._append_message("system", system_prompt)
+        # Постоянная HTTP сессия: переиспользует keep-alive соединение
+        # вместо нового TCP (и TLS) handshake на каждый запрос
+        self._session = self._create_session()
+
+    def _append_message(self, role: str, content: str) -> None:
+        """
+        Добавление сообщения в историю и в кэш JSON фрагментов.
+
+        Args:
+            role: Роль сообщения (system/user/assistant)
+            content: Текст сообщения
+        """
+        message = {"role": role, "content": content}
+        self._messages.append(message)
+        self._msg_frags.append(_dumps_bytes(message))
+        self._msg_tokens.append(self._estimate_tokens(content))
+        self._history_version += 1
+        self._trim_context()
+
+    def _estimate_tokens(self, text: str) -> int:
+        """
+        Быстрая оценка числа токенов в тексте.
+
+        Args:
+            text: Текст сообщения
+
+        Returns:
+            Примерное количество токенов
+        """
+        return len(text) // self.CHARS_PER_TOKEN + 1
+
+    def _drop_oldest_message(self) -> None:
+        """Удаление старейшего не-системного сообщения (индекс 1)."""
+        self._messages.pop(1)
+        for frags in (self._msg_frags, self._msg_tokens):
+            system_entry = frags.popleft()
+            frags.popleft()
+            frags.appendleft(system_entry)
+        self._history_version += 1
+
+    def _trim_context(self) -> None:
+        """
+        Скользящее окно контекста.
+
+        Пока суммарная оценка токенов превышает бюджет, выбрасывает
+        старейшие сообщения после системного промпта, так что стоимость
+        prefill остается ограниченной независимо от длины диалога.
+        Системный промпт и последнее сообщение сохраняются всегда.
+        """
+        total = sum(self._msg_tokens)
+        while total > self._max_context_tokens and len(self._messages) > 2:
+            total -= self._msg_tokens[1]
+            self._drop_oldest_message()
+
+    def _create_session(self) -> "requests.Session":
+        """
+        Создание HTTP сессии клиента.
+
+        Подклассы могут вернуть общую сессию вместо персональной.
+
+        Returns:
+            Сессия для всех запросов клиента
+        """
+        return requests.Session()
+
+    def close(self) -> None:
+        """
+        Закрытие HTTP сессии и освобождение соединений.
+        """
+        self._session.close()
+
+    def __enter__(self) -> "BaseLLMClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def send_message(self, message: str) -> str:
         """
         Отправка сообщения в LLM.
@@ -41,9 +247,8 @@ class BaseLLMClient(ABC):
         Returns:
             Текст ответа от модели
         """
-        pass
+        raise NotImplementedError
     
-    @abstractmethod
     def send_tool_result(self, tool_name: str, result: Any) -> str:
         """
         Отправка результата выполнения инструмента в LLM.
@@ -55,7 +260,7 @@ class BaseLLMClient(ABC):
         Returns:
             Новый ответ модели с учетом результата
         """
-        pass
+        raise NotImplementedError
     
     def get_messages_history(self) -> List[Dict[str, str]]:
         """
@@ -65,13 +270,47 @@ class BaseLLMClient(ABC):
             Копия списка сообщений в формате [{role, content}, ...]
         """
         return self._messages.copy()
+
+    @property
+    def estimated_context_tokens(self) -> int:
+        """
+        Текущая оценка размера контекста в токенах.
+
+        Суммирует закэшированные при добавлении оценки (включая
+        системный промпт) — без повторной токенизации истории.
+
+        Returns:
+            Примерное количество токенов в контексте
+        """
+        return sum(self._msg_tokens)
+
+    @property
+    def messages_view(self) -> tuple:
+        """
+        Неизменяемый снимок истории без копирования на каждый вызов.
+
+        Снимок пересобирается только когда история изменилась
+        (отслеживается счетчиком версий), так что повторные чтения —
+        O(1) без аллокаций.
+
+        Returns:
+            Кортеж сообщений в формате ({role, content}, ...)
+        """
+        if self._history_snapshot_version != self._history_version:
+            self._history_snapshot = tuple(self._messages)
+            self._history_snapshot_version = self._history_version
+        return self._history_snapshot
     
     def clear_history(self) -> None:
         """
         Очистка истории сообщений.
         Системный промпт сохраняется.
         """
-        self._messages = [{"role": "system", "content": self._system_prompt}]
+        self._messages = []
+        self._msg_frags = deque()
+        self._msg_tokens = deque()
+        self._history_version += 1
+        self._append_message("system", self._system_prompt)
     
     def set_system_prompt(self, prompt: str) -> None:
         """
@@ -82,6 +321,9 @@ class BaseLLMClient(ABC):
         """
         self._system_prompt = prompt
         self._messages[0] = {"role": "system", "content": prompt}
+        self._msg_frags[0] = _dumps_bytes(self._messages[0])
+        self._msg_tokens[0] = self._estimate_tokens(prompt)
+        self._history_version += 1
 
 
 class PerplexityClient(BaseLLMClient):
@@ -94,23 +336,52 @@ class PerplexityClient(BaseLLMClient):
     - Обработку ответов с tool calls
     """
     
+    __slots__ = ("_api_key", "_headers", "_body_prefix", "_body_suffix",
+                 "_payload_template", "_chat_url")
+
     API_BASE_URL = "https://api.perplexity.ai"
     MODEL_NAME = "sonar-pro"
     
-    def __init__(self, api_key: str, system_prompt: str) -> None:
+    def __init__(self, api_key: str, system_prompt: str,
+                 max_context_tokens: int = 6000) -> None:
         """
         Инициализация клиента.
         
         Args:
             api_key: API ключ Perplexity
             system_prompt: Системный промпт для модели
+            max_context_tokens: Бюджет токенов на контекст
         """
-        super().__init__(system_prompt)
+        super().__init__(system_prompt, max_context_tokens=max_context_tokens)
         self._api_key = api_key
         self._headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self._session.headers.update(self._headers)
+        # Автоматический retry на транзиентных ошибках (учитывает Retry-After)
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(["POST"])
+        )
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=4, pool_maxsize=8, max_retries=retry
+        )
+        self._session.mount("https://", adapter)
+        # Шаблон тела запроса: меняется только список сообщений
+        self._body_prefix = f'{{"model":"{self.MODEL_NAME}","messages":['.encode("utf-8")
+        self._body_suffix = b'],"temperature":0.7,"max_tokens":2048,"disable_search":true}'
+        self._payload_template = {
+            "model": self.MODEL_NAME,
+            "messages": None,
+            "temperature": 0.7,
+            "max_tokens": 2048,
+            "disable_search": True
+        }
+        self._chat_url = f"{self.API_BASE_URL}/chat/completions"
     
     def send_message(self, message: str) -> str:
         """
@@ -122,25 +393,8 @@ class PerplexityClient(BaseLLMClient):
         Returns:
             Текст ответа от модели
         """
-        self._messages.append({"role": "user", "content": message})
-        
-        payload = self._build_request_payload()
-        
-        response = requests.post(
-            f"{self.API_BASE_URL}/chat/completions",
-            headers=self._headers,
-            json=payload
-        )
-        
-        if response.status_code != 200:
-            self._handle_api_error(response.status_code, response.text)
-        
-        response_text = self._parse_response(response.json())
-        
-        self._messages.append({"role": "assistant", "content": response_text})
-        
-        return response_text
-    
+        return self._post_and_record(message)
+
     def send_tool_result(self, tool_name: str, result: Any) -> str:
         """
         Отправка результата выполнения инструмента в LLM.
@@ -152,41 +406,115 @@ class PerplexityClient(BaseLLMClient):
         Returns:
             Новый ответ модели с учетом результата
         """
-        message = f"Результат выполнения инструмента {tool_name}:\n{json.dumps(result, ensure_ascii=False)}"
-        
-        self._messages.append({"role": "user", "content": message})
-        
-        payload = self._build_request_payload()
-        
-        response = requests.post(
-            f"{self.API_BASE_URL}/chat/completions",
-            headers=self._headers,
-            json=payload
+        message = f"Результат выполнения инструмента {tool_name}:\n{_dumps_bytes(result).decode('utf-8')}"
+        return self._post_and_record(message)
+
+    def _post_and_record(self, user_content: str) -> str:
+        """
+        Общий путь отправки: записать сообщение, выполнить запрос,
+        записать ответ.
+
+        Args:
+            user_content: Текст пользовательского сообщения
+
+        Returns:
+            Текст ответа модели
+        """
+        self._append_message("user", user_content)
+
+        # Горячий путь: атрибуты поднимаем в локальные переменные,
+        # лукап локальной переменной быстрее атрибутного
+        post = self._session.post
+        body, extra_headers = _compress_body(self._build_request_body())
+        response = post(
+            self._chat_url,
+            data=body,
+            headers=extra_headers,
+            timeout=120
         )
-        
+
         if response.status_code != 200:
             self._handle_api_error(response.status_code, response.text)
-        
-        response_text = self._parse_response(response.json())
-        
-        self._messages.append({"role": "assistant", "content": response_text})
-        
+
+        response_text = self._parse_response(_loads_bytes(response.content))
+
+        self._append_message("assistant", response_text)
+
         return response_text
     
+    def send_message_stream(self, message: str) -> Generator[str, None, None]:
+        """
+        Потоковая отправка сообщения в LLM.
+
+        Отдает фрагменты ответа по мере генерации (SSE поток), так что
+        вызывающий код может начинать обработку с первого токена, не
+        дожидаясь полного ответа. Полный текст добавляется в историю
+        после завершения потока.
+
+        Args:
+            message: Текст сообщения пользователя
+
+        Yields:
+            Фрагменты текста ответа модели
+        """
+        self._append_message("user", message)
+
+        payload = self._build_request_payload()
+        payload["stream"] = True
+
+        response = self._session.post(
+            self._chat_url,
+            data=_dumps_bytes(payload),
+            timeout=120,
+            stream=True
+        )
+
+        if response.status_code != 200:
+            self._handle_api_error(response.status_code, response.text)
+
+        chunks: List[str] = []
+        try:
+            for line in response.iter_lines():
+                if not line or not line.startswith(b"data: "):
+                    continue
+                data = line[6:]
+                if data == b"[DONE]":
+                    break
+                try:
+                    frame = _loads_bytes(data)
+                    delta = frame["choices"][0].get("delta", {})
+                    content = delta.get("content", "")
+                except (ValueError, KeyError, IndexError):
+                    continue
+                if content:
+                    chunks.append(content)
+                    yield content
+        finally:
+            # Записываем и при досрочном закрытии генератора (close()):
+            # принятая часть ответа должна попасть в историю
+            self._append_message("assistant", "".join(chunks))
+            response.close()
+
+    def _build_request_body(self) -> bytes:
+        """
+        Сборка тела запроса из пре-сериализованных фрагментов истории.
+
+        Сериализуется только новое сообщение (O(1) на ход), вся
+        остальная история склеивается из готовых байтов.
+
+        Returns:
+            JSON тело запроса (bytes)
+        """
+        return self._body_prefix + b",".join(self._msg_frags) + self._body_suffix
+
     def _build_request_payload(self) -> Dict[str, Any]:
         """
         Формирование payload для API запроса.
-        
+
         Returns:
             Словарь с параметрами запроса
         """
-        return {
-            "model": self.MODEL_NAME,
-            "messages": self._messages,
-            "temperature": 0.7,
-            "max_tokens": 2048,
-            "disable_search": True
-        }
+        return dict(self._payload_template, messages=self._messages)
     
     def _parse_response(self, response_json: Dict[str, Any]) -> str:
         """
@@ -230,6 +558,126 @@ class PerplexityClient(BaseLLMClient):
             raise APIError(f"Ошибка API: {status_code} - {response_text}")
 
 
+class AsyncPerplexityClient(PerplexityClient):
+    """
+    Асинхронный клиент для Perplexity API.
+
+    Позволяет запускать независимые диалоги конкурентно через
+    asyncio.gather: N запросов занимают ~1 RTT вместо N*RTT.
+    Все экземпляры разделяют один httpx.AsyncClient с пулом соединений.
+    """
+
+    __slots__ = ()
+
+    _shared_client: Any = None
+
+    def __init__(self, api_key: str, system_prompt: str,
+                 max_context_tokens: int = 6000) -> None:
+        """
+        Инициализация асинхронного клиента.
+
+        Args:
+            api_key: API ключ Perplexity
+            system_prompt: Системный промпт для модели
+            max_context_tokens: Бюджет токенов на контекст
+
+        Raises:
+            ImportError: Если httpx не установлен
+        """
+        if httpx is None:
+            raise ImportError(
+                "Для AsyncPerplexityClient требуется httpx: pip install httpx"
+            )
+        super().__init__(api_key, system_prompt,
+                         max_context_tokens=max_context_tokens)
+
+    @classmethod
+    def _get_async_client(cls) -> "httpx.AsyncClient":
+        """Получение общего httpx.AsyncClient (создается лениво)."""
+        if cls._shared_client is None or cls._shared_client.is_closed:
+            cls._shared_client = httpx.AsyncClient(
+                base_url=cls.API_BASE_URL,
+                timeout=60
+            )
+        return cls._shared_client
+
+    async def asend_message(self, message: str) -> str:
+        """
+        Асинхронная отправка сообщения в LLM.
+
+        Args:
+            message: Текст сообщения пользователя
+
+        Returns:
+            Текст ответа от модели
+        """
+        self._append_message("user", message)
+
+        response = await self._get_async_client().post(
+            "/chat/completions",
+            content=self._build_request_body(),
+            headers=self._headers
+        )
+
+        if response.status_code != 200:
+            self._handle_api_error(response.status_code, response.text)
+
+        response_text = self._parse_response(_loads_bytes(response.content))
+
+        self._append_message("assistant", response_text)
+
+        return response_text
+
+    async def asend_tool_result(self, tool_name: str, result: Any) -> str:
+        """
+        Асинхронная отправка результата инструмента в LLM.
+
+        Args:
+            tool_name: Имя вызванного инструмента
+            result: Результат выполнения инструмента
+
+        Returns:
+            Новый ответ модели с учетом результата
+        """
+        message = f"Результат выполнения инструмента {tool_name}:\n{json.dumps(result, ensure_ascii=False)}"
+        return await self.asend_message(message)
+
+    async def abatch_messages(self, messages: List[str]) -> List[str]:
+        """
+        Конкурентная обработка независимых сообщений.
+
+        Для каждого сообщения создается отдельный клиент с тем же
+        системным промптом, все запросы уходят одновременно.
+
+        Args:
+            messages: Список независимых сообщений
+
+        Returns:
+            Список ответов (в том же порядке, что и сообщения)
+        """
+        clones = [
+            AsyncPerplexityClient(self._api_key, self._system_prompt)
+            for _ in messages
+        ]
+        try:
+            responses = await asyncio.gather(
+                *[clone.asend_message(msg)
+                  for clone, msg in zip(clones, messages)]
+            )
+        finally:
+            # Асинхронные запросы идут через общий httpx-клиент класса;
+            # синхронная сессия клона не нужна и не должна протекать
+            for clone in clones:
+                clone.close()
+        return list(responses)
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Закрытие общего асинхронного HTTP клиента."""
+        if cls._shared_client is not None and not cls._shared_client.is_closed:
+            await cls._shared_client.aclose()
+
+
 class LocalLLMClient(BaseLLMClient):
     """
     Клиент для локальных LLM моделей через Ollama.
@@ -239,9 +687,21 @@ class LocalLLMClient(BaseLLMClient):
     - Управление историей сообщений
     - Chat completions через /api/chat endpoint
     """
+
+    __slots__ = (
+        "_host", "_port", "_model_name", "_temperature", "_keep_alive",
+        "_base_url", "_tags_url", "_probe_ok", "_probe_ts",
+        "_body_prefix", "_body_suffix", "_payload_template",
+    )
+
+    # Общая сессия для всех экземпляров: один пул соединений к Ollama
+    _shared_session: Any = None
+    _session_lock = threading.Lock()
     
     def __init__(self, host: str, port: int, model_name: str, 
-                 system_prompt: str, temperature: float = 0.7) -> None:
+                 system_prompt: str, temperature: float = 0.7,
+                 max_context_tokens: int = 6000,
+                 keep_alive: str = "30m") -> None:
         """
         Инициализация клиента для локальной LLM.
         
@@ -251,13 +711,88 @@ class LocalLLMClient(BaseLLMClient):
             model_name: Название модели (например, "qwen3:8b")
             system_prompt: Системный промпт для модели
             temperature: Температура генерации (0.0-1.0)
+            max_context_tokens: Бюджет токенов на контекст
+            keep_alive: Сколько держать модель загруженной после запроса
+                (избегает повторного cold-start и прогрева KV кэша)
         """
-        super().__init__(system_prompt)
+        super().__init__(system_prompt, max_context_tokens=max_context_tokens)
         self._host = host
         self._port = port
         self._model_name = model_name
         self._temperature = temperature
+        self._keep_alive = keep_alive
         self._base_url = f"http://{host}:{port}/api/chat"
+        self._tags_url = f"http://{host}:{port}/api/tags"
+        self._payload_template = {
+            "model": model_name,
+            "messages": None,
+            "stream": False,
+            "keep_alive": keep_alive,
+            "options": {"temperature": temperature}
+        }
+        # Кэш последней проверки доступности модели
+        self._probe_ok: bool = False
+        self._probe_ts: float = float("-inf")
+        # Шаблон тела запроса: меняется только список сообщений
+        self._body_prefix = f'{{"model":"{model_name}","messages":['.encode("utf-8")
+        self._body_suffix = (
+            f'],"stream":false,"keep_alive":{json.dumps(keep_alive)},'
+            f'"options":{{"temperature":{json.dumps(temperature)}}}}}'
+        ).encode("utf-8")
+    
+    def _create_session(self) -> "requests.Session":
+        """
+        Все экземпляры разделяют одну сессию (см. _get_session).
+
+        Returns:
+            Общая сессия класса
+        """
+        return type(self)._get_session()
+
+    @classmethod
+    def _get_session(cls) -> "requests.Session":
+        """
+        Ленивое создание общей сессии с большим пулом соединений.
+
+        Returns:
+            Общая сессия класса
+        """
+        if cls._shared_session is None:
+            with cls._session_lock:
+                if cls._shared_session is None:
+                    session = requests.Session()
+                    session.headers["Content-Type"] = "application/json"
+                    # Автоматический retry на транзиентных ошибках Ollama;
+                    # connect=2 — недоступный сервер должен падать быстро
+                    from urllib3.util.retry import Retry
+                    retry = Retry(
+                        total=5,
+                        connect=2,
+                        backoff_factor=0.5,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        allowed_methods=frozenset(["POST"])
+                    )
+                    adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=4, pool_maxsize=64, max_retries=retry
+                    )
+                    session.mount("http://", adapter)
+                    cls._shared_session = session
+        return cls._shared_session
+
+    @classmethod
+    def close_shared(cls) -> None:
+        """Закрытие общей сессии (например, при остановке приложения)."""
+        with cls._session_lock:
+            if cls._shared_session is not None:
+                cls._shared_session.close()
+                cls._shared_session = None
+
+    def close(self) -> None:
+        """
+        Сессия общая для всех экземпляров — закрывается только явно
+        через close_shared().
+        """
+        pass
     
     def send_message(self, message: str) -> str:
         """
@@ -269,21 +804,12 @@ class LocalLLMClient(BaseLLMClient):
         Returns:
             Текст ответа от модели
         """
-        self._messages.append({"role": "user", "content": message})
-        
-        payload = {
-            "model": self._model_name,
-            "messages": self._messages,
-            "stream": False,
-            "options": {
-                "temperature": self._temperature
-            }
-        }
+        self._append_message("user", message)
         
         try:
-            response = requests.post(
+            response = self._session.post(
                 self._base_url,
-                json=payload,
+                data=self._build_request_body(),
                 timeout=120  # Локальная модель может генерировать дольше
             )
         except requests.exceptions.ConnectionError:
@@ -298,11 +824,176 @@ class LocalLLMClient(BaseLLMClient):
                 f"Ошибка Ollama API: {response.status_code} - {response.text}"
             )
         
-        response_text = self._parse_response(response.json())
-        self._messages.append({"role": "assistant", "content": response_text})
+        response_text = self._parse_response(_loads_bytes(response.content))
+        self._append_message("assistant", response_text)
         
         return response_text
     
+    def _build_request_body(self) -> bytes:
+        """
+        Сборка тела запроса из пре-сериализованных фрагментов истории.
+
+        Returns:
+            JSON тело запроса (bytes)
+        """
+        return self._body_prefix + b",".join(self._msg_frags) + self._body_suffix
+
+    def send_message_stream(self, message: str) -> Generator[str, None, None]:
+        """
+        Потоковая отправка сообщения в локальную LLM.
+
+        Отдает фрагменты ответа по мере генерации (NDJSON поток Ollama),
+        не дожидаясь полной генерации. Полный текст добавляется в
+        историю после завершения потока.
+
+        Args:
+            message: Текст сообщения пользователя
+
+        Yields:
+            Фрагменты текста ответа модели
+        """
+        self._append_message("user", message)
+
+        payload = dict(self._payload_template,
+                       messages=self._messages, stream=True)
+
+        try:
+            response = self._session.post(
+                self._base_url,
+                data=_dumps_bytes(payload),
+                timeout=120,
+                stream=True
+            )
+        except requests.exceptions.ConnectionError:
+            raise LocalLLMConnectionError(
+                f"Не удалось подключиться к Ollama на {self._host}:{self._port}"
+            )
+        except requests.exceptions.Timeout:
+            raise LocalLLMConnectionError("Таймаут при генерации ответа")
+
+        if response.status_code != 200:
+            raise LocalLLMError(
+                f"Ошибка Ollama API: {response.status_code} - {response.text}"
+            )
+
+        chunks: List[str] = []
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                try:
+                    frame = _loads_bytes(line)
+                except ValueError:
+                    continue
+                content = frame.get("message", {}).get("content", "")
+                if content:
+                    chunks.append(content)
+                    yield content
+                if frame.get("done"):
+                    break
+        finally:
+            # Записываем и при досрочном закрытии генератора (close()):
+            # принятая часть ответа должна попасть в историю
+            self._append_message("assistant", "".join(chunks))
+            response.close()
+
+    def batch_send(self, prompts: List[str]) -> List[str]:
+        """
+        Конкурентная отправка независимых промптов в Ollama.
+
+        Каждый промпт уходит отдельным запросом (системный промпт общий),
+        так что Ollama может обрабатывать их параллельно (continuous
+        batching). История сообщений не изменяется — промпты независимы.
+
+        Args:
+            prompts: Список независимых промптов
+
+        Returns:
+            Список ответов (в том же порядке, что и промпты)
+        """
+        if not prompts:
+            return []
+
+        def send_one(prompt: str) -> str:
+            payload = dict(self._payload_template, messages=[
+                {"role": "system", "content": self._system_prompt},
+                {"role": "user", "content": prompt}
+            ])
+
+            try:
+                response = self._session.post(
+                    self._base_url,
+                    data=_dumps_bytes(payload),
+                    timeout=120
+                )
+            except requests.exceptions.ConnectionError:
+                raise LocalLLMConnectionError(
+                    f"Не удалось подключиться к Ollama на {self._host}:{self._port}"
+                )
+            except requests.exceptions.Timeout:
+                raise LocalLLMConnectionError("Таймаут при генерации ответа")
+
+            if response.status_code != 200:
+                raise LocalLLMError(
+                    f"Ошибка Ollama API: {response.status_code} - {response.text}"
+                )
+
+            return self._parse_response(_loads_bytes(response.content))
+
+        max_workers = min(len(prompts), 16)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map сохраняет порядок результатов
+            return list(executor.map(send_one, prompts))
+
+    def batch_prompt(self, prompts: List[str], max_batch: int = 8) -> List[str]:
+        """
+        Упаковка нескольких независимых промптов в один запрос.
+
+        Все вопросы склеиваются в одно сообщение с маркерами [[Qi]],
+        модель просят ответить в формате [[Ai]]. Системный промпт и
+        служебные токены оплачиваются один раз на весь батч, а не на
+        каждый вопрос. История сообщений не изменяется.
+
+        Args:
+            prompts: Список независимых промптов
+            max_batch: Максимальный размер батча (защита от переполнения
+                лимита токенов ответа)
+
+        Returns:
+            Список ответов (в том же порядке, что и промпты; пустая
+            строка, если ответ на вопрос не удалось распарсить)
+
+        Raises:
+            ValueError: Если промптов больше max_batch
+        """
+        if not prompts:
+            return []
+        if len(prompts) > max_batch:
+            raise ValueError(
+                f"Слишком много промптов в батче: {len(prompts)} > {max_batch}"
+            )
+
+        instruction = (
+            "Ответь на каждый вопрос независимо. "
+            "Формат ответа: [[A<номер>]] <ответ> для каждого вопроса.\n\n"
+        )
+        user_msg = instruction + "\n".join(
+            f"[[Q{i + 1}]] {prompt}" for i, prompt in enumerate(prompts)
+        )
+
+        raw_response = self.batch_send([user_msg])[0]
+
+        answers = [""] * len(prompts)
+        matches = re.findall(
+            r"\[\[A(\d+)\]\](.*?)(?=\[\[A\d+\]\]|\Z)", raw_response, re.DOTALL
+        )
+        for number, text in matches:
+            idx = int(number) - 1
+            if 0 <= idx < len(prompts):
+                answers[idx] = text.strip()
+
+        return answers
+
     def send_tool_result(self, tool_name: str, result: Any) -> str:
         """
         Отправка результата выполнения инструмента в локальную LLM.
@@ -338,22 +1029,61 @@ class LocalLLMClient(BaseLLMClient):
         except (KeyError, TypeError) as e:
             raise ValueError(f"Неожиданный формат ответа Ollama API: {e}")
     
-    def check_model_availability(self) -> bool:
+    def check_model_availability(self, ttl: float = 60.0) -> bool:
         """
         Проверка доступности модели.
-        
+
+        Сначала спрашивает дешевый /api/tags (список моделей) вместо
+        полного chat-запроса с прогревом модели; результат кэшируется
+        на ttl секунд. Полный chat-пробник остается запасным путем,
+        если /api/tags недоступен.
+
+        Args:
+            ttl: Время жизни закэшированного результата в секундах
+
         Returns:
             True если модель доступна и отвечает
         """
+        now = time.monotonic()
+        if now - self._probe_ts < ttl:
+            return self._probe_ok
+
+        self._probe_ok = self._probe_model()
+        self._probe_ts = now
+        return self._probe_ok
+
+    @staticmethod
+    def _full_model_name(name: str) -> str:
+        """Каноническое имя модели: отсутствующий тег — это :latest."""
+        return name if ":" in name else f"{name}:latest"
+
+    def _probe_model(self) -> bool:
+        """Однократная проверка доступности модели (без кэша)."""
+        try:
+            response = self._session.get(self._tags_url, timeout=2)
+            if response.status_code == 200:
+                models = _loads_bytes(response.content).get("models", [])
+                # Сравнение полного имени с тегом: установленный
+                # qwen3:32b не делает доступным qwen3:8b
+                wanted = self._full_model_name(self._model_name)
+                return any(
+                    self._full_model_name(m.get("name", "")) == wanted
+                    for m in models
+                )
+        except Exception:
+            pass
+
+        # Запасной путь: реальный chat-пробник
         try:
             test_payload = {
                 "model": self._model_name,
                 "messages": [{"role": "user", "content": "test"}],
-                "stream": False
+                "stream": False,
+                "keep_alive": self._keep_alive
             }
-            response = requests.post(
+            response = self._session.post(
                 self._base_url,
-                json=test_payload,
+                data=_dumps_bytes(test_payload),
                 timeout=30
             )
             return response.status_code == 200
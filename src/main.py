@@ -5,19 +5,218 @@
 с пользователем.
 """
 
+import hashlib
 import os
+import pickle
+import re
 import sys
 import json
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cached_property
 from typing import Optional, Any, Dict, List
 
 import yaml
 
-from llm_client import PerplexityClient, LocalLLMClient, BaseLLMClient
-from mcp_handler import MCPHandler, MCPServerConfig, ToolCallRequest
-from rag import DocumentIndexer, EmbeddingGenerator, DocumentRetriever
-from rag.embeddings import EmbeddingConfig
-from prompts import get_system_prompt
+try:
+    # Быстрая сериализация для ключей кэшей (опционально)
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+try:
+    # C-реализация парсера (libyaml) — в разы быстрее чистого Python
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Кэш распарсенных конфигов: повторные запуски пропускают YAML парсинг
+_CONFIG_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'supportai')
+
+# Внутрипроцессный кэш конфигов: {путь: (mtime_ns, size, config)}
+_config_memo: Dict[str, tuple] = {}
+
+# Пути проекта — чистые функции от __file__, вычисляются один раз при импорте
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_API_CFG = os.path.join(_BASE_DIR, 'config', 'api_keys.yaml')
+_MCP_CFG = os.path.join(_BASE_DIR, 'config', 'mcp_config.yaml')
+_LLM_CFG = os.path.join(_BASE_DIR, 'config', 'local_llm_config.yaml')
+_DOCS_DIR = os.path.join(_BASE_DIR, 'docs')
+_EMBEDDINGS_PATH = os.path.join(_BASE_DIR, 'data', 'embeddings.json')
+
+# Вырезание незавершённых tool_call блоков (компилируется один раз)
+_TOOL_CALL_STRIP_RE = re.compile(r'<tool_call>.*?</tool_call>', re.DOTALL)
+
+# Параметры кэша результатов инструментов
+_TOOL_CACHE_SIZE = 128
+_TOOL_CACHE_TTL = 300.0  # секунд
+
+# Параметры кэша поиска по базе знаний
+_SEARCH_CACHE_SIZE = 256
+_SEARCH_CACHE_TTL = 300.0  # секунд
+
+# TTL дискового кэша манифеста инструментов MCP
+_TOOLS_CACHE_TTL = 600.0  # секунд
+
+# Параметры семантического кэша ответов LLM
+_SEMANTIC_CACHE_SIZE = 512
+_SEMANTIC_CACHE_TTL = 600.0  # секунд
+_SEMANTIC_CACHE_THRESHOLD = 0.92  # минимальное косинусное сходство
+# Пауза после сбоя эмбединг-сервера: чат не должен платить retry
+# генератора (секунды ожидания) на каждое сообщение, пока Ollama лежит
+_EMB_BACKOFF_TTL = 60.0  # секунд
+
+# Параметры кэша точных совпадений запросов
+_EXACT_CACHE_SIZE = 1024
+_EXACT_CACHE_TTL = 300.0  # секунд
+
+# Кэш статусов тикетов: короткий TTL — статус может меняться
+_TICKET_CACHE_SIZE = 64
+_TICKET_CACHE_TTL = 60.0  # секунд
+
+# Мемоизация системного промпта: ключ — хэш схем инструментов
+_prompt_cache: Dict[bytes, str] = {}
+
+
+def _dumps_sorted(obj: Any) -> bytes:
+    """
+    Каноничная JSON-сериализация для ключей кэшей (bytes).
+
+    Args:
+        obj: Сериализуемый объект
+
+    Returns:
+        JSON с отсортированными ключами в виде bytes
+    """
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True).encode()
+
+
+def _loads(text: str) -> Any:
+    """
+    Парсинг JSON через orjson (если доступен) с фолбэком на stdlib.
+
+    Args:
+        text: JSON-строка
+
+    Returns:
+        Распарсенный объект
+
+    Raises:
+        ValueError: При некорректном JSON (JSONDecodeError — её подкласс,
+            как и orjson.JSONDecodeError)
+    """
+    if _orjson is not None:
+        return _orjson.loads(text)
+    return json.loads(text)
+
+# Статические баннеры: строятся один раз при импорте, а не при каждом выводе
+_WELCOME_BANNER = """
+╔════════════════════════════════════════════════╗
+║         SUPPORT ASSISTANT v1.0                 ║
+║     Ассистент службы поддержки                 ║
+╚════════════════════════════════════════════════╝
+
+Доступные команды:
+  /voice          - Голосовой ввод (нажмите Enter для остановки)
+  /index          - Индексировать документацию
+  /clear          - Очистить историю диалога
+  /status <id>    - Проверить статус тикета
+  /help           - Показать справку
+  /exit           - Выход
+
+Начните диалог с приветствия!
+    \n"""
+
+_HELP_TEXT = """
+Справка по командам:
+
+  /voice
+    Включает голосовой ввод с распознаванием речи
+    Говорите в микрофон, затем нажмите Enter для остановки записи
+    Распознанный текст автоматически отправляется ассистенту
+    Поддерживается русский язык
+
+  /index
+    Запускает индексацию всех документов в папке docs/
+    Документы разбиваются на чанки и сохраняются с эмбедингами
+
+  /clear
+    Очищает историю текущего диалога
+    Системный промпт сохраняется
+
+  /status <ticket_id>
+    Проверяет статус тикета по его ID
+    Пример: /status TKT-12345
+
+  /help
+    Показывает эту справку
+
+  /cache_clear
+    Очищает кэши ответов, поиска и инструментов
+
+  /exit или /quit
+    Завершает работу программы
+
+Для общения с ассистентом просто введите ваш вопрос.
+    \n"""
+
+# Тяжёлые компоненты (numpy, requests и весь граф их зависимостей)
+# импортируются лениво через PEP 562: `import main`, /help и ошибки
+# конфигурации не платят за импорт RAG/LLM стека
+_LAZY_IMPORTS = {
+    'PerplexityClient': ('llm_client', 'PerplexityClient'),
+    'LocalLLMClient': ('llm_client', 'LocalLLMClient'),
+    'BaseLLMClient': ('llm_client', 'BaseLLMClient'),
+    'MCPHandler': ('mcp_handler', 'MCPHandler'),
+    'MCPServerConfig': ('mcp_handler', 'MCPServerConfig'),
+    'ToolCallRequest': ('mcp_handler', 'ToolCallRequest'),
+    'DocumentIndexer': ('rag', 'DocumentIndexer'),
+    'EmbeddingGenerator': ('rag', 'EmbeddingGenerator'),
+    'DocumentRetriever': ('rag', 'DocumentRetriever'),
+    'EmbeddingConfig': ('rag.embeddings', 'EmbeddingConfig'),
+    'get_system_prompt': ('prompts', 'get_system_prompt'),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Ленивый импорт тяжёлых компонентов при первом обращении (PEP 562).
+
+    Args:
+        name: Имя атрибута модуля
+
+    Returns:
+        Импортированный класс или функция
+
+    Raises:
+        AttributeError: Если атрибут не найден
+    """
+    try:
+        module_name, attr = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+    value = getattr(importlib.import_module(module_name), attr)
+    # Кэшируем в globals: повторные обращения идут мимо __getattr__
+    globals()[name] = value
+    return value
+
+
+def _load_runtime_deps() -> None:
+    """
+    Материализует все ленивые импорты перед созданием ассистента.
+
+    Обращение через атрибуты модуля сохраняет работоспособность
+    unittest.mock.patch('main.<имя>') в тестах.
+    """
+    module = sys.modules[__name__]
+    for name in _LAZY_IMPORTS:
+        getattr(module, name)
 
 
 def load_config(config_path: str) -> dict:
@@ -33,9 +232,49 @@ def load_config(config_path: str) -> dict:
     Raises:
         FileNotFoundError: Если файл не найден
         yaml.YAMLError: Если ошибка парсинга YAML
+
+    Результат кэшируется в памяти процесса (и на диске) с инвалидацией
+    по mtime; возвращаемый словарь разделяется между вызовами и не
+    должен мутироваться.
     """
+    stat = os.stat(config_path)
+
+    # Горячий путь: повторная загрузка в том же процессе (например,
+    # несколько SupportAssistant в тестах) — без диска и парсинга
+    memo = _config_memo.get(config_path)
+    if memo is not None and memo[0] == stat.st_mtime_ns and memo[1] == stat.st_size:
+        return memo[2]
+
+    cache_key = hashlib.sha256(
+        f"{os.path.abspath(config_path)}:{stat.st_mtime_ns}:{stat.st_size}".encode()
+    ).hexdigest()
+    cache_path = os.path.join(_CONFIG_CACHE_DIR, f"{cache_key}.pkl")
+
+    # Попытка прочитать из кэша (ключ включает mtime — инвалидация бесплатна)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                config = pickle.load(f)
+            _config_memo[config_path] = (stat.st_mtime_ns, stat.st_size, config)
+            return config
+        except (OSError, pickle.PickleError, EOFError):
+            pass
+
     with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+        config = yaml.load(f, Loader=_YamlLoader)
+
+    # Сохраняем в кэш (best effort: ошибки кэша не должны ломать запуск)
+    try:
+        os.makedirs(_CONFIG_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(config, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+    _config_memo[config_path] = (stat.st_mtime_ns, stat.st_size, config)
+    return config
 
 
 class SupportAssistant:
@@ -47,7 +286,19 @@ class SupportAssistant:
     - MCP обработчик для вызова инструментов
     - RAG система для поиска в документации
     """
-    
+
+    # Таблица диспетчеризации команд: {команда: (метод, нужен_аргумент)}
+    _COMMANDS = {
+        '/voice': ('_handle_voice_input', False),
+        '/index': ('_do_index', False),
+        '/clear': ('_handle_clear', False),
+        '/status': ('_check_ticket_status', True),
+        '/help': ('_handle_help', False),
+        '/cache_clear': ('_handle_cache_clear', False),
+        '/exit': ('_handle_exit', False),
+        '/quit': ('_handle_exit', False),
+    }
+
     def __init__(self) -> None:
         """
         Инициализация ассистента.
@@ -59,40 +310,32 @@ class SupportAssistant:
         - Загрузить системный промпт
         - Инициализировать историю диалога
         """
-        # Определи пути к конфигам (относительно src/)
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        # Загрузи конфигурации
-        self._api_config = load_config(os.path.join(base_dir, 'config', 'api_keys.yaml'))
-        self._mcp_config = load_config(os.path.join(base_dir, 'config', 'mcp_config.yaml'))
-        self._llm_config = load_config(os.path.join(base_dir, 'config', 'local_llm_config.yaml'))
-        
+        _load_runtime_deps()
+
+        # Загрузи конфигурации (пути посчитаны один раз на уровне модуля)
+        self._api_config = load_config(_API_CFG)
+        self._mcp_config = load_config(_MCP_CFG)
+        self._llm_config = load_config(_LLM_CFG)
+
         # Пути к данным
-        self._docs_dir = os.path.join(base_dir, 'docs')
-        self._embeddings_path = os.path.join(base_dir, 'data', 'embeddings.json')
+        self._docs_dir = _DOCS_DIR
+        self._embeddings_path = _EMBEDDINGS_PATH
         
-        # 1. Embedding Generator
-        emb_config = EmbeddingConfig(
-            host=self._llm_config['embedding_model']['host'],
-            port=self._llm_config['embedding_model']['port'],
-            model_name=self._llm_config['embedding_model']['model_name'],
-            endpoint=self._llm_config['embedding_model']['endpoint']
+        # Общая HTTP сессия: embed/tool вызовы переиспользуют TCP
+        # соединения вместо рукопожатия на каждый запрос
+        import requests
+        self._http = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=32, pool_maxsize=32
         )
-        self._embedding_generator = EmbeddingGenerator(emb_config)
-        
-        # 2. Document Indexer
-        self._indexer = DocumentIndexer(
-            self._docs_dir,
-            self._embeddings_path
-        )
-        
-        # 3. Document Retriever
-        self._retriever = DocumentRetriever(
-            self._embeddings_path,
-            self._embedding_generator
-        )
-        
-        # 4. MCP Handler
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
+
+        # RAG компоненты (_embedding_generator, _indexer, _retriever) —
+        # ленивые cached_property: строятся при первом обращении, так что
+        # чат без поиска не платит за загрузку индекса с диска
+
+        # MCP Handler
         servers = {}
         for name, cfg in self._mcp_config['servers'].items():
             servers[name] = MCPServerConfig(
@@ -100,7 +343,7 @@ class SupportAssistant:
                 port=cfg['port'],
                 endpoint=cfg['endpoint']
             )
-        self._mcp_handler = MCPHandler(servers)
+        self._mcp_handler = MCPHandler(servers, session=self._http)
         
         # Зарегистрируй локальный инструмент search_knowledge_base
         self._mcp_handler.register_local_tool(
@@ -119,6 +362,28 @@ class SupportAssistant:
             }
         )
 
+        # Зарегистрируй батч-вариант поиска: несколько запросов
+        # обрабатываются за один round-trip к embedding-серверу
+        self._mcp_handler.register_local_tool(
+            name="search_knowledge_base_batch",
+            handler=self._search_knowledge_base_batch,
+            description=(
+                "Поиск в базе знаний по нескольким запросам сразу. "
+                "Предпочитай этот инструмент, если нужно несколько поисков."
+            ),
+            parameters={
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Список поисковых запросов"
+                    }
+                },
+                "required": ["queries"]
+            }
+        )
+
         # Зарегистрируй локальный инструмент recommend_tasks
         self._mcp_handler.register_local_tool(
             name="recommend_tasks",
@@ -141,13 +406,173 @@ class SupportAssistant:
             }
         )
         
+        # Кэш результатов инструментов: LLM в агентном цикле нередко
+        # повторяет один и тот же вызов — отдаём результат без RTT
+        self._tool_cache: 'OrderedDict[tuple, tuple]' = OrderedDict()
+
+        # Кэш поиска по базе знаний: повторный запрос пропускает
+        # и генерацию эмбединга, и скан векторного индекса
+        self._search_cache: 'OrderedDict[tuple, tuple]' = OrderedDict()
+
+        # Семантический кэш ответов: [(вектор, timestamp, ответ)] —
+        # перефразированные повторы FAQ отвечаются без вызова LLM
+        self._semantic_cache: List[tuple] = []
+        # До этого момента семантический кэш отключён (эмбединг-сервер
+        # недоступен; см. _semantic_cache_lookup)
+        self._emb_down_until: float = 0.0
+
+        # Кэш побайтово идентичных запросов: дешевле семантического,
+        # проверяется первым (ключ учитывает историю диалога)
+        self._exact_cache: 'OrderedDict[bytes, tuple]' = OrderedDict()
+
+        # Кэш статусов тикетов для /status: повтор того же ID в пределах
+        # минуты не ходит в MCP
+        self._ticket_cache: 'OrderedDict[str, tuple]' = OrderedDict()
+
         # 5. Получение списка инструментов от MCP сервера
-        tools = self._fetch_mcp_tools()
+        # (свежий дисковый кэш избавляет холодный старт от HTTP round-trip'ов)
+        self._tools_cache_path = self._tools_cache_file(servers)
+        tools = self._load_tools_cache()
+        if tools is None:
+            tools = self._fetch_mcp_tools()
+            self._save_tools_cache(tools)
         
         # 6. LLM Client с динамическим системным промптом
-        system_prompt = get_system_prompt(tools_override=tools)
+        system_prompt = self._build_system_prompt(tools)
         self._llm_client = self._create_llm_client(system_prompt)
-    
+
+    @cached_property
+    def _embedding_generator(self) -> 'EmbeddingGenerator':
+        """Генератор эмбедингов — строится при первом обращении."""
+        emb_config = EmbeddingConfig(
+            host=self._llm_config['embedding_model']['host'],
+            port=self._llm_config['embedding_model']['port'],
+            model_name=self._llm_config['embedding_model']['model_name'],
+            endpoint=self._llm_config['embedding_model']['endpoint']
+        )
+        return EmbeddingGenerator(emb_config, session=self._http)
+
+    @cached_property
+    def _indexer(self) -> 'DocumentIndexer':
+        """Индексатор документов — строится при первом обращении."""
+        return DocumentIndexer(self._docs_dir, self._embeddings_path)
+
+    @cached_property
+    def _retriever(self) -> 'DocumentRetriever':
+        """Retriever — строится (и грузит индекс) при первом обращении."""
+        return DocumentRetriever(
+            self._embeddings_path,
+            self._embedding_generator
+        )
+
+    @staticmethod
+    def _build_system_prompt(tools: list) -> str:
+        """
+        Построение системного промпта с мемоизацией.
+
+        Схемы инструментов меняются редко — при совпадении их хэша
+        сборка многокилобайтного промпта заменяется на dict lookup.
+
+        Args:
+            tools: Список инструментов для промпта
+
+        Returns:
+            Текст системного промпта
+        """
+        try:
+            key = hashlib.blake2b(
+                _dumps_sorted(tools), digest_size=16
+            ).digest()
+        except (TypeError, ValueError):
+            # Несериализуемый список (например, моки) — без мемоизации
+            return get_system_prompt(tools_override=tools)
+
+        prompt = _prompt_cache.get(key)
+        if prompt is not None:
+            return prompt
+
+        # Дисковый слой: тёплый старт процесса пропускает сборку промпта
+        cache_path = os.path.join(
+            _CONFIG_CACHE_DIR, f"system_prompt_{key.hex()}.txt"
+        )
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                prompt = f.read()
+            _prompt_cache[key] = prompt
+            return prompt
+        except OSError:
+            pass
+
+        prompt = get_system_prompt(tools_override=tools)
+        _prompt_cache[key] = prompt
+
+        # Байт-в-байт одинаковый промпт между запусками также даёт
+        # провайдеру шанс переиспользовать KV-кэш префикса
+        try:
+            os.makedirs(_CONFIG_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{cache_path}.tmp.{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(prompt)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+        return prompt
+
+    @staticmethod
+    def _tools_cache_file(servers: dict) -> str:
+        """
+        Путь к файлу кэша манифеста инструментов.
+
+        Ключ — хэш конфигурации серверов: смена хоста/порта даёт
+        другой файл, кэш другой конфигурации не переиспользуется.
+
+        Args:
+            servers: Словарь конфигураций MCP серверов
+
+        Returns:
+            Абсолютный путь к файлу кэша
+        """
+        cache_key = hashlib.sha256(json.dumps(
+            sorted((name, cfg.host, cfg.port) for name, cfg in servers.items())
+        ).encode()).hexdigest()
+        return os.path.join(_CONFIG_CACHE_DIR, f"tools_{cache_key}.json")
+
+    def _load_tools_cache(self) -> Optional[list]:
+        """
+        Чтение манифеста инструментов из дискового кэша.
+
+        Returns:
+            Список инструментов или None, если кэш отсутствует/устарел
+        """
+        try:
+            if time.time() - os.path.getmtime(self._tools_cache_path) >= _TOOLS_CACHE_TTL:
+                return None
+            with open(self._tools_cache_path, 'r', encoding='utf-8') as f:
+                tools = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if isinstance(tools, list):
+            print(f"[MCP] Манифест инструментов из кэша ({len(tools)} шт.)")
+            return tools
+        return None
+
+    def _save_tools_cache(self, tools: list) -> None:
+        """
+        Запись манифеста инструментов в дисковый кэш (best effort).
+
+        Args:
+            tools: Список инструментов для сохранения
+        """
+        try:
+            os.makedirs(_CONFIG_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{self._tools_cache_path}.tmp.{os.getpid()}"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(tools, f, ensure_ascii=False)
+            os.replace(tmp_path, self._tools_cache_path)
+        except (OSError, TypeError, ValueError):
+            pass
+
     def _fetch_mcp_tools(self) -> list:
         """
         Получение списка инструментов от MCP серверов.
@@ -156,15 +581,30 @@ class SupportAssistant:
             Список инструментов с описаниями и схемами параметров
         """
         tools = []
-        
-        # Получаем инструменты от каждого MCP сервера
-        for server_name in self._mcp_handler._servers.keys():
-            try:
-                server_tools = self._mcp_handler.get_server_tools(server_name)
-                tools.extend(server_tools)
-                print(f"[MCP] Загружено {len(server_tools)} инструментов от {server_name}")
-            except Exception as e:
-                print(f"[MCP] Предупреждение: не удалось получить инструменты от {server_name}: {e}")
+
+        # Запрашиваем инструменты у серверов параллельно: каждый запрос —
+        # независимый HTTP round-trip, суммарная задержка падает до max(rtt)
+        server_names = list(self._mcp_handler._servers.keys())
+        if server_names:
+            tools_by_server: Dict[str, list] = {}
+            with ThreadPoolExecutor(max_workers=len(server_names)) as executor:
+                futures = {
+                    executor.submit(self._mcp_handler.get_server_tools, name): name
+                    for name in server_names
+                }
+                for future in as_completed(futures):
+                    server_name = futures[future]
+                    try:
+                        server_tools = future.result()
+                        tools_by_server[server_name] = server_tools
+                        print(f"[MCP] Загружено {len(server_tools)} инструментов от {server_name}")
+                    except Exception as e:
+                        print(f"[MCP] Предупреждение: не удалось получить инструменты от {server_name}: {e}")
+
+            # Стабильный порядок: инструменты идут в порядке конфигурации
+            # серверов, а не в порядке завершения запросов
+            for server_name in server_names:
+                tools.extend(tools_by_server.get(server_name, []))
         
         # Добавляем локальные инструменты
         for name, tool_info in self._mcp_handler._local_tools.items():
@@ -176,7 +616,7 @@ class SupportAssistant:
         
         return tools
     
-    def _create_llm_client(self, system_prompt: str) -> BaseLLMClient:
+    def _create_llm_client(self, system_prompt: str) -> 'BaseLLMClient':
         """
         Создание LLM клиента в зависимости от конфигурации.
         
@@ -187,7 +627,11 @@ class SupportAssistant:
             Экземпляр LLM клиента (Perplexity или локальный)
         """
         provider = self._api_config.get('llm_provider', 'perplexity').lower()
-        
+
+        # Фоновая проверка доступности модели: событие взводится при провале
+        self._model_check_failed = threading.Event()
+        self._model_warning_shown = False
+
         if provider == 'local':
             # Используем локальную модель через Ollama
             chat_config = self._llm_config.get('chat_model', {})
@@ -206,12 +650,15 @@ class SupportAssistant:
                 temperature=temperature
             )
             
-            # Проверяем доступность модели
-            if not client.check_model_availability():
-                print(f"[LLM] ПРЕДУПРЕЖДЕНИЕ: Модель {model_name} недоступна!")
-                print(f"[LLM] Убедитесь, что Ollama запущен и модель загружена:")
-                print(f"[LLM]   ollama run {model_name}")
-            
+            # Проверяем доступность модели в фоне, чтобы не блокировать
+            # запуск CLI на round-trip до Ollama
+            def _probe() -> None:
+                if not client.check_model_availability():
+                    self._model_check_failed.set()
+
+            self._model_name = model_name
+            threading.Thread(target=_probe, daemon=True).start()
+
             return client
         else:
             # Используем Perplexity API (по умолчанию)
@@ -223,6 +670,21 @@ class SupportAssistant:
                 system_prompt=system_prompt
             )
     
+    def _warn_if_model_unavailable(self) -> None:
+        """
+        Разовый вывод предупреждения, если фоновая проверка модели провалилась.
+
+        Проверка запускается в _create_llm_client и не блокирует старт;
+        здесь лишь смотрим на результат перед отправкой сообщения.
+        """
+        if self._model_warning_shown or not self._model_check_failed.is_set():
+            return
+        self._model_warning_shown = True
+        model_name = getattr(self, '_model_name', '?')
+        print(f"[LLM] ПРЕДУПРЕЖДЕНИЕ: Модель {model_name} недоступна!")
+        print(f"[LLM] Убедитесь, что Ollama запущен и модель загружена:")
+        print(f"[LLM]   ollama run {model_name}")
+
     def start(self) -> None:
         """
         Запуск консольного интерфейса.
@@ -232,6 +694,7 @@ class SupportAssistant:
         - Запустить главный цикл обработки ввода
         - Обрабатывать команды и сообщения пользователя
         """
+        self._setup_readline()
         self.print_welcome()
         
         while True:
@@ -252,6 +715,46 @@ class SupportAssistant:
             except Exception as e:
                 print(f"\nОшибка: {e}")
     
+    def _setup_readline(self) -> None:
+        """
+        Подключение readline: история команд и tab-дополнение.
+
+        История сохраняется в ~/.cache/supportai/history, так что
+        повторяющиеся команды (например /status TKT-...) вызываются
+        стрелкой вверх вместо повторного набора.
+        """
+        try:
+            import readline
+        except ImportError:
+            # Платформа без readline (например, Windows) — просто input()
+            return
+
+        import atexit
+
+        histfile = os.path.join(_CONFIG_CACHE_DIR, 'history')
+        try:
+            readline.read_history_file(histfile)
+        except (FileNotFoundError, OSError):
+            pass
+
+        def _write_history() -> None:
+            try:
+                os.makedirs(_CONFIG_CACHE_DIR, exist_ok=True)
+                readline.write_history_file(histfile)
+            except OSError:
+                pass
+
+        atexit.register(_write_history)
+
+        commands = sorted(self._COMMANDS)
+
+        def _completer(text: str, state: int) -> Optional[str]:
+            matches = [c for c in commands if c.startswith(text)]
+            return matches[state] if state < len(matches) else None
+
+        readline.set_completer(_completer)
+        readline.parse_and_bind('tab: complete')
+
     def process_input(self, user_input: str) -> Optional[str]:
         """
         Обработка ввода пользователя.
@@ -295,30 +798,47 @@ class SupportAssistant:
         parts = command.split()
         cmd = parts[0].lower()
         args = parts[1:] if len(parts) > 1 else []
-        
-        if cmd == '/voice':
-            return self._handle_voice_input()
-        elif cmd == '/index':
-            return self._do_index()
-        elif cmd == '/clear':
-            self.clear_history()
-            return "История диалога очищена."
-        elif cmd == '/status' and args:
-            return self._check_ticket_status(args[0])
-        elif cmd == '/help':
-            self.print_help()
-            return None
-        elif cmd in ['/exit', '/quit']:
-            print("До свидания!")
-            sys.exit(0)
-        else:
+
+        # O(1) поиск обработчика вместо цепочки сравнений
+        entry = self._COMMANDS.get(cmd)
+        if entry is None:
             return f"Неизвестная команда: {cmd}. Введите /help для справки."
-    
+
+        method_name, needs_arg = entry
+        if needs_arg:
+            if not args:
+                # /status без аргумента — как и раньше, неизвестная команда
+                return f"Неизвестная команда: {cmd}. Введите /help для справки."
+            return getattr(self, method_name)(args[0])
+        return getattr(self, method_name)()
+
+    def _handle_clear(self) -> str:
+        """Обработчик команды /clear."""
+        self.clear_history()
+        return "История диалога очищена."
+
+    def _handle_help(self) -> Optional[str]:
+        """Обработчик команды /help."""
+        self.print_help()
+        return None
+
+    def _handle_exit(self) -> None:
+        """Обработчик команд /exit и /quit."""
+        # Аккуратно возвращаем keep-alive соединения пула перед выходом
+        try:
+            self._llm_client.close()
+        except Exception:
+            pass
+        print("До свидания!")
+        sys.exit(0)
+
     def _do_index(self) -> str:
         """Запуск индексации документов."""
         print("Начинаю индексацию документов...")
         try:
             result = self._indexer.index_all(self._embedding_generator)
+            # Индекс изменился — закэшированные результаты устарели
+            self._search_cache.clear()
             return (f"Индексация завершена!\n"
                     f"Файлов: {result.total_files}\n"
                     f"Чанков: {result.total_chunks}\n"
@@ -327,7 +847,16 @@ class SupportAssistant:
             return f"Ошибка индексации: {e}"
     
     def _check_ticket_status(self, ticket_id: str) -> str:
-        """Проверка статуса тикета через MCP."""
+        """Проверка статуса тикета через MCP (с коротким TTL-кэшем)."""
+        now = time.monotonic()
+        cached = self._ticket_cache.get(ticket_id)
+        if cached is not None:
+            timestamp, formatted = cached
+            if now - timestamp < _TICKET_CACHE_TTL:
+                self._ticket_cache.move_to_end(ticket_id)
+                return formatted
+            del self._ticket_cache[ticket_id]
+
         request = ToolCallRequest(
             tool_name="get_ticket",
             parameters={"id": ticket_id}
@@ -336,13 +865,22 @@ class SupportAssistant:
         if result.success:
             ticket_data = result.result
             # Форматируем вывод тикета
+            formatted = f"Тикет {ticket_id}: {ticket_data}"
             if isinstance(ticket_data, dict):
                 content = ticket_data.get('content', [])
                 if content and isinstance(content, list):
                     for item in content:
                         if item.get('type') == 'text':
-                            return f"Тикет {ticket_id}:\n{item.get('text', 'Нет данных')}"
-            return f"Тикет {ticket_id}: {ticket_data}"
+                            formatted = (
+                                f"Тикет {ticket_id}:\n"
+                                f"{item.get('text', 'Нет данных')}"
+                            )
+                            break
+            # Кэшируем только успешные ответы
+            self._ticket_cache[ticket_id] = (now, formatted)
+            if len(self._ticket_cache) > _TICKET_CACHE_SIZE:
+                self._ticket_cache.popitem(last=False)
+            return formatted
         return f"Ошибка: {result.error_message}"
     
     def _handle_voice_input(self) -> Optional[str]:
@@ -395,11 +933,171 @@ class SupportAssistant:
         - При наличии tool_call - выполнить и отправить результат обратно
         - Вернуть финальный ответ
         """
-        # Отправь сообщение
-        response = self._llm_client.send_message(message)
-        
+        self._warn_if_model_unavailable()
+
+        # Слой 1: точное совпадение (O(1) lookup, без эмбединга)
+        exact_key = self._exact_cache_key(message)
+        if exact_key is not None:
+            cached = self._exact_cache.get(exact_key)
+            if cached is not None:
+                timestamp, cached_response = cached
+                if time.monotonic() - timestamp < _EXACT_CACHE_TTL:
+                    self._exact_cache.move_to_end(exact_key)
+                    return cached_response
+                del self._exact_cache[exact_key]
+
+        # Слой 2: семантический кэш — перефразированный повтор вопроса
+        # возвращается за миллисекунды вместо секунд генерации
+        query_vec, cached_response = self._semantic_cache_lookup(message)
+        if cached_response is not None:
+            return cached_response
+
+        # Отправь сообщение (потоково, с ранним обрывом на tool_call)
+        response = self._send_with_early_abort(message)
+
+        # Ответы с tool_call не кэшируем: результат зависит от
+        # состояния внешних систем, а не только от вопроса
+        had_tool_call = self._mcp_handler.has_tool_call(response)
+
         # Проверь и обработай tool calls
-        return self.process_tool_calls(response)
+        final_response = self.process_tool_calls(response)
+
+        if not had_tool_call:
+            if query_vec is not None:
+                self._semantic_cache_store(query_vec, final_response)
+            if exact_key is not None:
+                self._exact_cache[exact_key] = (time.monotonic(), final_response)
+                if len(self._exact_cache) > _EXACT_CACHE_SIZE:
+                    self._exact_cache.popitem(last=False)
+
+        return final_response
+
+    def _exact_cache_key(self, message: str) -> Optional[bytes]:
+        """
+        Ключ кэша точных совпадений.
+
+        Хэш включает историю диалога: тот же вопрос в другом контексте
+        не должен получать чужой ответ.
+
+        Args:
+            message: Текст сообщения пользователя
+
+        Returns:
+            SHA-256 дайджест или None, если ключ построить нельзя
+        """
+        try:
+            digest = hashlib.sha256()
+            digest.update(repr(self._llm_client.messages_view).encode())
+            digest.update(b"\x00")
+            digest.update(message.encode())
+            return digest.digest()
+        except Exception:
+            return None
+
+    def _semantic_cache_lookup(self, message: str) -> tuple:
+        """
+        Поиск семантически близкого вопроса в кэше ответов.
+
+        Args:
+            message: Текст сообщения пользователя
+
+        Returns:
+            Кортеж (вектор запроса или None, закэшированный ответ или None)
+        """
+        import numpy as np
+
+        # Негативный кэш: после сбоя эмбединг-сервера не пытаемся
+        # эмбедить каждое сообщение — чат работает и без RAG-кэша
+        if time.monotonic() < self._emb_down_until:
+            return None, None
+
+        try:
+            embedding = self._embedding_generator.generate(message)
+            vec = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vec))
+            if norm == 0 or vec.ndim != 1:
+                return None, None
+            vec /= norm
+        except Exception:
+            # Embedding-сервер недоступен — работаем без кэша и
+            # не трогаем его ближайшие _EMB_BACKOFF_TTL секунд
+            self._emb_down_until = time.monotonic() + _EMB_BACKOFF_TTL
+            return None, None
+
+        now = time.monotonic()
+        # Отбрасываем протухшие записи
+        self._semantic_cache = [
+            entry for entry in self._semantic_cache
+            if now - entry[1] < _SEMANTIC_CACHE_TTL
+        ]
+        if not self._semantic_cache:
+            return vec, None
+
+        # Точный поиск по внутреннему произведению (векторы нормированы)
+        matrix = np.stack([entry[0] for entry in self._semantic_cache])
+        similarities = matrix @ vec
+        best = int(similarities.argmax())
+        if similarities[best] >= _SEMANTIC_CACHE_THRESHOLD:
+            return vec, self._semantic_cache[best][2]
+        return vec, None
+
+    def _semantic_cache_store(self, query_vec: Any, response: str) -> None:
+        """
+        Сохранение ответа в семантический кэш.
+
+        Args:
+            query_vec: Нормированный вектор вопроса
+            response: Финальный ответ ассистента
+        """
+        self._semantic_cache.append((query_vec, time.monotonic(), response))
+        if len(self._semantic_cache) > _SEMANTIC_CACHE_SIZE:
+            del self._semantic_cache[0]
+
+    def _handle_cache_clear(self) -> str:
+        """Обработчик команды /cache_clear."""
+        self._exact_cache.clear()
+        self._semantic_cache.clear()
+        self._search_cache.clear()
+        self._tool_cache.clear()
+        self._ticket_cache.clear()
+        self._emb_down_until = 0.0
+        return "Кэши ответов, поиска и инструментов очищены."
+
+    def _send_with_early_abort(self, message: str) -> str:
+        """
+        Отправка сообщения с потоковым чтением ответа.
+
+        Как только в потоке появился закрывающий тег </tool_call>,
+        генерация обрывается: остаток ответа всё равно был бы вырезан,
+        а RTT инструмента начинается на хвост генерации раньше.
+
+        Args:
+            message: Текст сообщения пользователя
+
+        Returns:
+            Накопленный текст ответа (возможно, оборванный после tool_call)
+        """
+        # Ищем метод на классе, а не на экземпляре: мок-объекты в тестах
+        # не проходят эту проверку и идут обычным небуферизованным путём
+        if getattr(type(self._llm_client), 'send_message_stream', None) is None:
+            return self._llm_client.send_message(message)
+
+        parts: List[str] = []
+        tail = ''
+        stream = self._llm_client.send_message_stream(message)
+        try:
+            for chunk in stream:
+                parts.append(chunk)
+                # Тег может попасть на границу чанков — держим хвост буфера
+                tail = (tail + chunk)[-64:]
+                if '</tool_call>' in tail:
+                    break
+        finally:
+            # close() досрочно завершает генератор; принятая часть
+            # ответа уже записана клиентом в историю
+            stream.close()
+
+        return ''.join(parts)
     
     def process_tool_calls(self, llm_response: str) -> str:
         """
@@ -423,47 +1121,157 @@ class SupportAssistant:
         current_response = llm_response
         
         for _ in range(max_iterations):
-            # Проверь наличие tool_call
-            if not self._mcp_handler.has_tool_call(current_response):
-                break
-            
-            # Распарси вызов
-            tool_request = self._mcp_handler.parse_tool_call(current_response)
-            if tool_request is None:
+            # Один проход по строке: собираем сразу все tool_call блоки
+            # хода — модель может запросить несколько инструментов
+            tool_requests = self._mcp_handler.parse_tool_calls(current_response)
+            if not tool_requests:
                 break
-            
-            print(f"\n[Вызов инструмента: {tool_request.tool_name}]")
-            
-            # Выполни инструмент
-            result = self._mcp_handler.call_tool(tool_request)
-            
-            # Форматируй результат
-            formatted_result = self._mcp_handler.format_tool_result(
-                tool_request.tool_name, result
-            )
-            
-            # Отправь результат обратно в LLM
+
+            for tool_request in tool_requests:
+                print(f"\n[Вызов инструмента: {tool_request.tool_name}]")
+
+            # Дубликаты в одном батче выполняются один раз: иначе два
+            # одинаковых вызова конкурентно проскочили бы мимо кэша
+            unique_requests: Dict[tuple, Any] = {}
+            for request in tool_requests:
+                unique_requests.setdefault(self._tool_request_key(request), request)
+
+            # Независимые вызовы выполняются конкурентно: суммарная
+            # задержка хода — max(rtt) вместо sum(rtt)
+            if len(unique_requests) == 1:
+                unique_results = [self._call_tool_cached(next(iter(unique_requests.values())))]
+            else:
+                with ThreadPoolExecutor(max_workers=len(unique_requests)) as executor:
+                    unique_results = list(executor.map(
+                        self._call_tool_cached, unique_requests.values()
+                    ))
+            results_by_key = dict(zip(unique_requests.keys(), unique_results))
+
+            # Форматируй результаты и отправь одним сообщением
+            formatted_results = [
+                self._mcp_handler.format_tool_result(
+                    request.tool_name,
+                    results_by_key[self._tool_request_key(request)]
+                )
+                for request in tool_requests
+            ]
             current_response = self._llm_client.send_tool_result(
-                tool_request.tool_name, 
-                formatted_result
+                ", ".join(request.tool_name for request in tool_requests),
+                "\n".join(formatted_results)
             )
         
         # Safety: strip any remaining tool_call tags if loop broke early
         if self._mcp_handler.has_tool_call(current_response):
-            import re
-            current_response = re.sub(r'<tool_call>.*?</tool_call>', '', current_response, flags=re.DOTALL).strip()
+            current_response = _TOOL_CALL_STRIP_RE.sub('', current_response).strip()
         
         return current_response
     
-    def _search_knowledge_base(self, query: str) -> dict:
+    @staticmethod
+    def _tool_request_key(tool_request: 'ToolCallRequest') -> tuple:
+        """
+        Каноничный ключ вызова инструмента (имя + параметры).
+
+        Args:
+            tool_request: Запрос на вызов инструмента
+
+        Returns:
+            Хэшируемый кортеж; несериализуемые параметры дают
+            уникальный ключ по id (без дедупликации)
+        """
+        try:
+            return (tool_request.tool_name, _dumps_sorted(tool_request.parameters))
+        except (TypeError, ValueError):
+            return (tool_request.tool_name, id(tool_request))
+
+    def _call_tool_cached(self, tool_request: 'ToolCallRequest') -> Any:
+        """
+        Вызов инструмента с кэшированием результата.
+
+        Повторный вызов с теми же именем и параметрами (частый паттерн
+        зацикливания агента) возвращает сохранённый результат без
+        обращения к MCP серверу.
+
+        Args:
+            tool_request: Запрос на вызов инструмента
+
+        Returns:
+            ToolCallResult выполнения (возможно, из кэша)
+        """
+        try:
+            key = (tool_request.tool_name,
+                   _dumps_sorted(tool_request.parameters))
+        except (TypeError, ValueError):
+            # Несериализуемые параметры — выполняем без кэша
+            return self._mcp_handler.call_tool(tool_request)
+
+        now = time.monotonic()
+        cached = self._tool_cache.get(key)
+        if cached is not None:
+            timestamp, result = cached
+            if now - timestamp < _TOOL_CACHE_TTL:
+                self._tool_cache.move_to_end(key)
+                return result
+            del self._tool_cache[key]
+
+        result = self._mcp_handler.call_tool(tool_request)
+        self._tool_cache[key] = (now, result)
+        if len(self._tool_cache) > _TOOL_CACHE_SIZE:
+            self._tool_cache.popitem(last=False)
+        return result
+
+    def _search_knowledge_base(self, query: str, top_k: int = 3) -> dict:
         """Обработчик для инструмента search_knowledge_base."""
+        key = (query, top_k)
+        now = time.monotonic()
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            timestamp, formatted = cached
+            if now - timestamp < _SEARCH_CACHE_TTL:
+                self._search_cache.move_to_end(key)
+                return {"success": True, "results": formatted}
+            del self._search_cache[key]
+
         try:
-            results = self._retriever.search(query, top_k=3)
+            results = self._retriever.search(query, top_k=top_k)
             formatted = self._retriever.format_results_for_llm(results)
-            return {"success": True, "results": formatted}
+        except Exception as e:
+            # Ошибки не кэшируем: следующая попытка может пройти
+            return {"success": False, "error": str(e)}
+
+        self._search_cache[key] = (now, formatted)
+        if len(self._search_cache) > _SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return {"success": True, "results": formatted}
+
+    def _search_knowledge_base_batch(self, queries: List[str],
+                                     top_k: int = 3) -> dict:
+        """
+        Обработчик для инструмента search_knowledge_base_batch.
+
+        Эмбединги всех запросов считаются одним обращением к серверу,
+        поэтому N поисков стоят один сетевой round-trip вместо N.
+        """
+        if not queries:
+            return {"success": False, "error": "Список запросов пуст"}
+
+        try:
+            batch_results = self._retriever.search_batch(queries, top_k=top_k)
+            formatted = [
+                self._retriever.format_results_for_llm(results)
+                for results in batch_results
+            ]
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+        # Пополняем кэш одиночного поиска: последующие повторы бесплатны
+        now = time.monotonic()
+        for query, result in zip(queries, formatted):
+            self._search_cache[(query, top_k)] = (now, result)
+        while len(self._search_cache) > _SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+
+        return {"success": True, "results": formatted}
+
     def _recommend_tasks(self, priority: Optional[List[str]] = None,
                          status: Optional[List[str]] = None) -> dict:
         """
@@ -493,21 +1301,25 @@ class SupportAssistant:
         normalized = [self._normalize_task(task) for task in tasks if isinstance(task, dict)]
 
         # Фильтруем done и применяем явные фильтры, если list_tasks их не обработал
+        # (множества фильтров строятся один раз, а не на каждой итерации)
+        priority_set = frozenset(p.lower() for p in (priority or ()))
+        status_set = frozenset(s.lower() for s in (status or ()))
         filtered = []
         for task in normalized:
             if task["status"] == "done":
                 continue
-            if priority and task["priority"] and task["priority"] not in [p.lower() for p in priority]:
+            if priority_set and task["priority"] and task["priority"] not in priority_set:
                 continue
-            if status and task["status"] and task["status"] not in [s.lower() for s in status]:
+            if status_set and task["status"] and task["status"] not in status_set:
                 continue
             filtered.append(task)
 
-        ranked = sorted(filtered, key=self._task_sort_key)
-        top_tasks = [self._present_task(task) for task in ranked[:3]]
+        # Нужны только топ-3 — не материализуем полный отсортированный список
+        ranked = self._rank_tasks(filtered, limit=3)
+        top_tasks = [self._present_task(task) for task in ranked]
 
         reasoning = []
-        for task in ranked[:3]:
+        for task in ranked:
             reasoning.append(self._build_reasoning(task))
 
         notes = [
@@ -542,8 +1354,8 @@ class SupportAssistant:
                         continue
                     text = item.get("text", "")
                     try:
-                        parsed = json.loads(text)
-                    except json.JSONDecodeError:
+                        parsed = _loads(text)
+                    except ValueError:
                         continue
                     if isinstance(parsed, list):
                         return parsed
@@ -572,13 +1384,6 @@ class SupportAssistant:
         elif blocked_by:
             blocked = True
 
-        due_date = None
-        if isinstance(due_date_raw, str):
-            try:
-                due_date = datetime.fromisoformat(due_date_raw.replace("Z", "+00:00"))
-            except ValueError:
-                due_date = None
-
         return {
             "id": task_id,
             "title": title,
@@ -586,32 +1391,105 @@ class SupportAssistant:
             "priority": priority,
             "blocked": blocked,
             "blocked_by": blocked_by,
-            "due_date": due_date,
             "due_date_raw": due_date_raw
         }
 
-    def _task_sort_key(self, task: Dict[str, Any]) -> tuple:
-        """Ключ сортировки для рекомендаций."""
-        status_rank = {
-            "in_progress": 0,
-            "open": 1,
-            "todo": 2,
-            "blocked": 3,
-            "on_hold": 4
-        }
-        priority_rank = {
-            "critical": 0,
-            "high": 1,
-            "medium": 2,
-            "low": 3
-        }
-        return (
-            status_rank.get(task["status"], 5),
-            priority_rank.get(task["priority"], 4),
-            1 if task["blocked"] else 0,
-            task["due_date"] or datetime.max,
-            task["title"] or ""
+    # Ранги для сортировки рекомендаций
+    _STATUS_RANK = {
+        "in_progress": 0,
+        "open": 1,
+        "todo": 2,
+        "blocked": 3,
+        "on_hold": 4
+    }
+    _PRIORITY_RANK = {
+        "critical": 0,
+        "high": 1,
+        "medium": 2,
+        "low": 3
+    }
+
+    def _rank_tasks(self, tasks: List[Dict[str, Any]],
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Сортировка задач по status → priority → blocked → due_date → title.
+
+        Колонки собираются в numpy-массивы и сортируются одним
+        lexsort: даты парсятся C-циклом datetime64 вместо
+        datetime.fromisoformat на каждую задачу.
+
+        Args:
+            tasks: Нормализованные задачи
+            limit: Вернуть только первые limit задач (None — все)
+
+        Returns:
+            Новый список задач в порядке ранжирования
+        """
+        if len(tasks) <= 1:
+            return list(tasks)
+
+        import numpy as np
+
+        n = len(tasks)
+        status_col = np.fromiter(
+            (self._STATUS_RANK.get(t["status"], 5) for t in tasks),
+            dtype=np.int64, count=n
+        )
+        priority_col = np.fromiter(
+            (self._PRIORITY_RANK.get(t["priority"], 4) for t in tasks),
+            dtype=np.int64, count=n
         )
+        blocked_col = np.fromiter(
+            (1 if t["blocked"] else 0 for t in tasks),
+            dtype=np.int64, count=n
+        )
+        due_col = self._parse_due_dates([t["due_date_raw"] for t in tasks])
+        title_col = np.array([t["title"] or "" for t in tasks])
+
+        # lexsort сортирует по последнему ключу в первую очередь
+        order = np.lexsort((title_col, due_col, blocked_col,
+                            priority_col, status_col))
+        if limit is not None:
+            order = order[:limit]
+        return [tasks[i] for i in order]
+
+    @staticmethod
+    def _parse_due_dates(raw_dates: List[Any]) -> 'Any':
+        """
+        Векторный парсинг дат дедлайнов в int64 для сортировки.
+
+        Args:
+            raw_dates: Сырые значения due_date (строки или None)
+
+        Returns:
+            numpy int64 массив; нераспознанные даты получают максимум
+            (сортируются последними, как и раньше)
+        """
+        import numpy as np
+
+        # Нормализация: наивная метка 'YYYY-MM-DDTHH:MM:SS' (смещение
+        # таймзоны отбрасывается — на ранжирование оно не влияет)
+        cleaned = []
+        for raw in raw_dates:
+            if isinstance(raw, str) and len(raw) >= 10:
+                cleaned.append(raw[:19] if len(raw) >= 19 else raw[:10])
+            else:
+                cleaned.append('NaT')
+
+        try:
+            parsed = np.array(cleaned, dtype='datetime64[s]')
+        except ValueError:
+            # Есть некорректная строка — парсим поэлементно
+            parsed = np.full(len(cleaned), np.datetime64('NaT'), dtype='datetime64[s]')
+            for i, value in enumerate(cleaned):
+                try:
+                    parsed[i] = np.datetime64(value, 's')
+                except ValueError:
+                    pass
+
+        as_int = parsed.astype(np.int64)
+        as_int[np.isnat(parsed)] = np.iinfo(np.int64).max
+        return as_int
 
     def _present_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Упрощенный вид задачи для ответа инструмента."""
@@ -646,8 +1524,10 @@ class SupportAssistant:
         Действия:
         - Очистить список сообщений
         - Сохранить системный промпт
+        - Сбросить кэш результатов инструментов
         """
         self._llm_client.clear_history()
+        self._tool_cache.clear()
     
     def print_welcome(self) -> None:
         """
@@ -658,22 +1538,7 @@ class SupportAssistant:
         - Показать доступные команды
         - Показать версию приложения
         """
-        print("""
-╔════════════════════════════════════════════════╗
-║         SUPPORT ASSISTANT v1.0                 ║
-║     Ассистент службы поддержки                 ║
-╚════════════════════════════════════════════════╝
-
-Доступные команды:
-  /voice          - Голосовой ввод (нажмите Enter для остановки)
-  /index          - Индексировать документацию
-  /clear          - Очистить историю диалога
-  /status <id>    - Проверить статус тикета
-  /help           - Показать справку
-  /exit           - Выход
-
-Начните диалог с приветствия!
-    """)
+        sys.stdout.write(_WELCOME_BANNER)
     
     def print_help(self) -> None:
         """
@@ -683,35 +1548,7 @@ class SupportAssistant:
         - Показать список всех доступных команд
         - Описать каждую команду
         """
-        print("""
-Справка по командам:
-
-  /voice
-    Включает голосовой ввод с распознаванием речи
-    Говорите в микрофон, затем нажмите Enter для остановки записи
-    Распознанный текст автоматически отправляется ассистенту
-    Поддерживается русский язык
-
-  /index
-    Запускает индексацию всех документов в папке docs/
-    Документы разбиваются на чанки и сохраняются с эмбедингами
-
-  /clear
-    Очищает историю текущего диалога
-    Системный промпт сохраняется
-
-  /status <ticket_id>
-    Проверяет статус тикета по его ID
-    Пример: /status TKT-12345
-
-  /help
-    Показывает эту справку
-
-  /exit или /quit
-    Завершает работу программы
-
-Для общения с ассистентом просто введите ваш вопрос.
-    """)
+        sys.stdout.write(_HELP_TEXT)
 
 
 def main() -> None:
@@ -722,7 +1559,18 @@ def main() -> None:
     - Создать экземпляр SupportAssistant
     - Запустить консольный интерфейс
     - Обработать исключения верхнего уровня
+
+    Флаг --refresh-tools сбрасывает дисковый кэш манифеста
+    инструментов перед запуском.
     """
+    if '--refresh-tools' in sys.argv[1:]:
+        import glob
+        for path in glob.glob(os.path.join(_CONFIG_CACHE_DIR, 'tools_*.json')):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
     try:
         assistant = SupportAssistant()
         assistant.start()
@@ -7,13 +7,62 @@
 Поддерживает MCP Streamable HTTP транспорт с SSE (Server-Sent Events).
 """
 
+import itertools
 import json
 import re
-from typing import Dict, Any, Optional, List, Callable
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from dataclasses import dataclass, field
 
 import requests
 
+try:
+    # Быстрый JSON: парсинг/сериализация — основная CPU-нагрузка
+    # на вызов инструмента после прогрева соединения
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+# Извлечение tool_call блока из ответа LLM (компилируется один раз)
+_TOOL_CALL_RE = re.compile(r'<tool_call>\s*(.*?)\s*</tool_call>', re.DOTALL)
+
+
+def _loads(text: str) -> Any:
+    """
+    Парсинг JSON через orjson с фолбэком на stdlib.
+
+    Args:
+        text: JSON-строка
+
+    Returns:
+        Распарсенный объект
+
+    Raises:
+        ValueError: При некорректном JSON (обе реализации кидают
+            подклассы ValueError)
+    """
+    if _orjson is not None:
+        return _orjson.loads(text)
+    return json.loads(text)
+
+
+def _dumps_pretty(obj: Any) -> str:
+    """
+    Сериализация JSON с отступом 2 (для тел tool_result).
+
+    Args:
+        obj: Сериализуемый объект
+
+    Returns:
+        JSON-строка с кириллицей без экранирования
+    """
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
 
 @dataclass
 class MCPServerConfig:
@@ -59,17 +108,67 @@ class MCPHandler:
     - Форматирование результатов для LLM
     """
     
-    def __init__(self, servers_config: Dict[str, MCPServerConfig]) -> None:
+    # TTL кэша здоровья и порог ошибок, после которого сессия сбрасывается
+    _HEALTH_TTL = 5.0  # секунд
+    _MAX_CONN_FAILURES = 3
+
+    # Неизменяемые параметры initialize-запроса
+    _INIT_PARAMS = {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {
+            "name": "ticketManager",
+            "version": "1.0.0"
+        }
+    }
+
+    def __init__(self, servers_config: Dict[str, MCPServerConfig],
+                 session: Optional['requests.Session'] = None) -> None:
         """
         Инициализация обработчика.
-        
+
         Args:
             servers_config: Словарь конфигураций серверов {name: config}
+            session: Общая HTTP сессия с пулом соединений (keep-alive);
+                None — обработчик создаёт собственную сессию
         """
+        if session is not None:
+            self._http = session
+            self._owns_http = False
+        else:
+            # Собственная сессия с пулом: без keep-alive каждый вызов
+            # инструмента платит TCP-рукопожатием и DNS-резолвом
+            self._http = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=max(len(servers_config), 1),
+                pool_maxsize=32
+            )
+            self._http.mount('http://', adapter)
+            self._owns_http = True
         self._servers = servers_config
         self._local_tools: Dict[str, Dict[str, Any]] = {}
         self._sessions: Dict[str, MCPSession] = {}  # server_name -> session
-        self._request_id = 0
+        self._sessions_lock = threading.Lock()  # параллельные health-пробы
+        # Атомарный под GIL счётчик id запросов (C-уровень, без гонок
+        # при параллельных health-пробах)
+        self._next_id = itertools.count(1).__next__
+
+        # URL и базовые заголовки не меняются между вызовами —
+        # считаем один раз вместо f-string/dict на каждый запрос
+        self._url_by_server = {
+            name: f"http://{cfg.host}:{cfg.port}{cfg.endpoint}"
+            for name, cfg in servers_config.items()
+        }
+        self._base_headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream"
+        }
+
+        # TTL-кэш здоровья серверов: {server_name: (is_available, timestamp)}
+        self._health_cache: Dict[str, Tuple[bool, float]] = {}
+        # Счётчик подряд идущих ошибок соединения для backoff:
+        # {server_name: (failures, last_failure_timestamp)}
+        self._conn_failures: Dict[str, Tuple[int, float]] = {}
         
         # Маппинг инструментов на серверы (базовый, расширяется динамически)
         self._tool_to_server: Dict[str, Optional[str]] = {
@@ -78,82 +177,90 @@ class MCPHandler:
         # Остальные инструменты будут добавлены динамически при вызове get_server_tools()
     
     def _get_next_request_id(self) -> int:
-        """Генерация уникального ID запроса."""
-        self._request_id += 1
-        return self._request_id
+        """Генерация уникального ID запроса (потокобезопасно)."""
+        return self._next_id()
     
-    def _parse_sse_response(self, response_text: str) -> Optional[Dict[str, Any]]:
+    def _parse_sse_response(self, response_text) -> Optional[Dict[str, Any]]:
         """
         Парсинг SSE ответа от MCP сервера.
-        
+
+        Принимает либо готовую строку, либо итератор строк
+        (response.iter_lines() при stream=True) — во втором случае
+        тело не буферизуется целиком, а разбор заканчивается на
+        первом валидном data-фрейме.
+
         Args:
-            response_text: Текст SSE ответа
-            
+            response_text: Текст SSE ответа или итератор строк/байтов
+
         Returns:
             Распарсенный JSON или None
         """
-        for line in response_text.strip().split('\n'):
-            line = line.strip()
-            if line.startswith('data: '):
-                json_str = line[6:]  # Remove 'data: ' prefix
+        if isinstance(response_text, str):
+            lines = response_text.strip().split('\n')
+        else:
+            lines = response_text
+
+        for raw in lines:
+            # Байтовые строки не декодируем: и orjson, и stdlib json
+            # принимают UTF-8 bytes напрямую
+            if isinstance(raw, bytes):
+                line = raw.strip()
+                prefix, prefix_len = b'data: ', 6
+            else:
+                line = raw.strip()
+                prefix, prefix_len = 'data: ', 6
+            if line.startswith(prefix):
                 try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
+                    return _loads(line[prefix_len:])
+                except ValueError:
                     continue
         return None
     
-    def _initialize_session(self, server_name: str) -> MCPSession:
+    def _initialize_session(self, server_name: str,
+                            timeout: Any = 30) -> MCPSession:
         """
         Инициализация сессии с MCP сервером.
-        
+
         Args:
             server_name: Имя сервера
-            
+            timeout: Таймаут запроса (число или кортеж connect/read)
+
         Returns:
             Объект сессии
-            
+
         Raises:
             MCPConnectionError: При ошибке подключения
         """
         server = self._servers.get(server_name)
         if not server:
             raise MCPConnectionError(f"Сервер '{server_name}' не найден в конфигурации")
-        
-        url = f"http://{server.host}:{server.port}{server.endpoint}"
-        
+
+        url = self._url_by_server[server_name]
+
         payload = {
             "jsonrpc": "2.0",
             "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {
-                    "name": "ticketManager",
-                    "version": "1.0.0"
-                }
-            },
+            "params": self._INIT_PARAMS,
             "id": self._get_next_request_id()
         }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream"
-        }
-        
+
+        headers = self._base_headers
+
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Явно устанавливаем кодировку UTF-8
-            response.encoding = 'utf-8'
-            
-            # Получаем session_id из заголовков
-            session_id = response.headers.get("mcp-session-id")
-            if not session_id:
-                raise MCPConnectionError("Сервер не вернул mcp-session-id")
-            
-            # Парсим SSE ответ
-            result = self._parse_sse_response(response.text)
+            response = self._http.post(url, json=payload, headers=headers,
+                                       timeout=timeout, stream=True)
+            try:
+                response.raise_for_status()
+
+                # Получаем session_id из заголовков
+                session_id = response.headers.get("mcp-session-id")
+                if not session_id:
+                    raise MCPConnectionError("Сервер не вернул mcp-session-id")
+
+                # Парсим SSE ответ построчно, без буферизации тела
+                result = self._parse_sse_response(response.iter_lines())
+            finally:
+                response.close()
             if not result:
                 raise MCPConnectionError("Не удалось распарсить ответ сервера")
             
@@ -167,7 +274,8 @@ class MCPHandler:
                 server_info=result.get("result", {}).get("serverInfo", {})
             )
             
-            self._sessions[server_name] = session
+            with self._sessions_lock:
+                self._sessions[server_name] = session
             return session
             
         except requests.exceptions.ConnectionError as e:
@@ -201,17 +309,19 @@ class MCPHandler:
                 return ToolCallResult(success=True, result=result)
             
             # Иначе ищем сервер для инструмента
-            server = self._get_server_for_tool(request.tool_name)
-            
-            if server is None:
+            resolved = self._get_server_for_tool(request.tool_name)
+
+            if resolved is None:
                 return ToolCallResult(
-                    success=False, 
+                    success=False,
                     result=None,
                     error_message=f"Сервер для инструмента '{request.tool_name}' не найден"
                 )
-            
+
             # Отправляем запрос на MCP сервер
-            result = self._send_mcp_request(server, request.tool_name, request.parameters)
+            server_name, _ = resolved
+            result = self._send_mcp_request(server_name, request.tool_name,
+                                            request.parameters)
             return ToolCallResult(success=True, result=result)
             
         except Exception as e:
@@ -227,23 +337,59 @@ class MCPHandler:
         Returns:
             ToolCallRequest если найден вызов, иначе None
         """
-        pattern = r'<tool_call>\s*(.*?)\s*</tool_call>'
-        
-        match = re.search(pattern, llm_response, re.DOTALL)
-        
+        # Дешёвая проверка подстроки до запуска regex-движка:
+        # частый случай — ответ вообще без вызовов инструментов
+        if '<tool_call>' not in llm_response:
+            return None
+
+        match = _TOOL_CALL_RE.search(llm_response)
+
         if not match:
             return None
-        
+
+        return self._parse_tool_call_match(match)
+
+    def parse_tool_calls(self, llm_response: str) -> List[ToolCallRequest]:
+        """
+        Парсинг всех вызовов инструментов из ответа LLM.
+
+        Модель может выдать несколько <tool_call> блоков за один ход
+        (параллельное использование инструментов) — возвращаем их все
+        в порядке появления, некорректные блоки пропускаются.
+
+        Args:
+            llm_response: Текст ответа LLM
+
+        Returns:
+            Список ToolCallRequest (пустой, если вызовов нет)
+        """
+        requests_list = []
+        for match in _TOOL_CALL_RE.finditer(llm_response):
+            request = self._parse_tool_call_match(match)
+            if request is not None:
+                requests_list.append(request)
+        return requests_list
+
+    @staticmethod
+    def _parse_tool_call_match(match: 're.Match') -> Optional[ToolCallRequest]:
+        """
+        Построение ToolCallRequest из regex-совпадения.
+
+        Args:
+            match: Совпадение _TOOL_CALL_RE
+
+        Returns:
+            ToolCallRequest или None при некорректном JSON
+        """
         try:
-            json_content = match.group(1)
-            data = json.loads(json_content)
-            
+            data = _loads(match.group(1))
+
             # Default parameters to empty dict if not provided
             return ToolCallRequest(
                 tool_name=data["tool"],
                 parameters=data.get("parameters", {})
             )
-        except (json.JSONDecodeError, KeyError):
+        except (ValueError, KeyError, TypeError):
             return None
     
     def format_tool_result(self, tool_name: str, result: ToolCallResult) -> str:
@@ -270,7 +416,7 @@ class MCPHandler:
                 "error": result.error_message
             }
         
-        json_str = json.dumps(output, ensure_ascii=False, indent=2)
+        json_str = _dumps_pretty(output)
         return f"<tool_result>\n{json_str}\n</tool_result>"
     
     def has_tool_call(self, llm_response: str) -> bool:
@@ -283,7 +429,9 @@ class MCPHandler:
         Returns:
             True если найден <tool_call>, иначе False
         """
-        return "<tool_call>" in llm_response and "</tool_call>" in llm_response
+        # Один проход вместо двух, с проверкой порядка тегов
+        start = llm_response.find("<tool_call>")
+        return start != -1 and llm_response.find("</tool_call>", start) != -1
     
     def get_available_tools(self) -> List[Dict[str, Any]]:
         """
@@ -318,44 +466,49 @@ class MCPHandler:
             description: Описание инструмента
             parameters: Схема параметров
         """
-        self._local_tools[name] = {
+        # Интернируем имя: ключи роутинга сравниваются по указателю
+        self._local_tools[sys.intern(name)] = {
             "handler": handler,
             "description": description,
             "parameters": parameters
         }
     
-    def _send_mcp_request(self, server: MCPServerConfig, 
+    def _send_mcp_request(self, server_name: str,
                           tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Отправка запроса на MCP сервер с поддержкой Streamable HTTP.
-        
+
         Args:
-            server: Конфигурация сервера
+            server_name: Имя сервера из конфигурации
             tool_name: Имя инструмента
             params: Параметры вызова
-            
+
         Returns:
             Результат выполнения инструмента
-            
+
         Raises:
             MCPConnectionError: При проблемах с подключением
             MCPToolError: При ошибке выполнения инструмента
         """
-        # Находим имя сервера по конфигурации
-        server_name = None
-        for name, cfg in self._servers.items():
-            if cfg.host == server.host and cfg.port == server.port:
-                server_name = name
-                break
-        
-        if not server_name:
-            raise MCPConnectionError("Не удалось определить имя сервера")
-        
+        server = self._servers.get(server_name)
+        if server is None:
+            raise MCPConnectionError(f"Сервер '{server_name}' не найден в конфигурации")
+
+        # Отрицательный кэш: недавно падавший сервер не долбим повторно
+        failures, last_failure = self._conn_failures.get(server_name, (0, 0.0))
+        if failures:
+            backoff = min(30.0, 2.0 ** failures)
+            if time.monotonic() - last_failure < backoff:
+                raise MCPConnectionError(
+                    f"Сервер '{server_name}' недоступен "
+                    f"(ошибок подряд: {failures}, backoff {backoff:.0f}с)"
+                )
+
         # Получаем или создаем сессию
         session = self._get_or_create_session(server_name)
-        
-        url = f"http://{server.host}:{server.port}{server.endpoint}"
-        
+
+        url = self._url_by_server[server_name]
+
         payload = {
             "jsonrpc": "2.0",
             "method": "tools/call",
@@ -365,28 +518,25 @@ class MCPHandler:
             },
             "id": self._get_next_request_id()
         }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream",
-            "mcp-session-id": session.session_id
-        }
-        
+
+        headers = {**self._base_headers, "mcp-session-id": session.session_id}
+
         try:
-            response = requests.post(
+            response = self._http.post(
                 url,
                 json=payload,
                 headers=headers,
-                timeout=30
+                timeout=30,
+                stream=True
             )
-            response.raise_for_status()
-            
-            # Явно устанавливаем кодировку UTF-8 для корректной обработки кириллицы
-            response.encoding = 'utf-8'
-            
-            # Парсим SSE ответ
-            response_data = self._parse_sse_response(response.text)
-            
+            try:
+                response.raise_for_status()
+
+                # Парсим SSE ответ построчно, без буферизации тела
+                response_data = self._parse_sse_response(response.iter_lines())
+            finally:
+                response.close()
+
             if not response_data:
                 raise MCPToolError("Не удалось распарсить ответ сервера")
             
@@ -394,34 +544,43 @@ class MCPHandler:
                 raise MCPToolError(
                     f"Ошибка инструмента: {response_data['error'].get('message', 'Unknown error')}"
                 )
-            
+
+            self._conn_failures.pop(server_name, None)
             return response_data["result"]
-            
+
         except requests.exceptions.ConnectionError as e:
-            # Сбрасываем сессию при ошибке соединения
-            self._sessions.pop(server_name, None)
+            # Копим ошибки; сессию сбрасываем только после серии подряд —
+            # одиночный сбой сети не должен стоить нового рукопожатия
+            failures += 1
+            self._conn_failures[server_name] = (failures, time.monotonic())
+            if failures >= self._MAX_CONN_FAILURES:
+                self._sessions.pop(server_name, None)
             raise MCPConnectionError(f"Не удалось подключиться к серверу {url}: {e}")
         except requests.exceptions.Timeout as e:
             raise MCPConnectionError(f"Таймаут подключения к серверу {url}: {e}")
         except requests.exceptions.RequestException as e:
             raise MCPConnectionError(f"Ошибка запроса к серверу {url}: {e}")
     
-    def _get_server_for_tool(self, tool_name: str) -> Optional[MCPServerConfig]:
+    def _get_server_for_tool(self, tool_name: str) -> Optional[Tuple[str, MCPServerConfig]]:
         """
         Определение сервера для инструмента.
-        
+
         Args:
             tool_name: Имя инструмента
-            
+
         Returns:
-            Конфигурация сервера или None если инструмент локальный
+            Пара (имя сервера, конфигурация) или None если инструмент
+            локальный либо сервер неизвестен
         """
         server_name = self._tool_to_server.get(tool_name)
-        
+
         if server_name is None:
             return None
-        
-        return self._servers.get(server_name)
+
+        server = self._servers.get(server_name)
+        if server is None:
+            return None
+        return server_name, server
     
     def check_servers_health(self) -> Dict[str, bool]:
         """
@@ -431,15 +590,40 @@ class MCPHandler:
             Словарь {server_name: is_available}
         """
         health_status: Dict[str, bool] = {}
-        
-        for server_name, server_config in self._servers.items():
+        now = time.monotonic()
+
+        # Свежие результаты берём из TTL-кэша — без повторного handshake
+        to_probe = []
+        for server_name in self._servers:
+            cached = self._health_cache.get(server_name)
+            if cached is not None and now - cached[1] < self._HEALTH_TTL:
+                health_status[server_name] = cached[0]
+            else:
+                to_probe.append(server_name)
+
+        if not to_probe:
+            return health_status
+
+        def _probe(server_name: str) -> bool:
             try:
-                # Пытаемся инициализировать сессию
-                self._initialize_session(server_name)
-                health_status[server_name] = True
+                # Короткий таймаут: это проба, а не рабочий вызов
+                self._initialize_session(server_name, timeout=(2, 5))
+                return True
             except (MCPConnectionError, MCPToolError):
-                health_status[server_name] = False
-        
+                return False
+
+        # Пробы независимы по I/O — запускаем параллельно
+        with ThreadPoolExecutor(max_workers=min(16, len(to_probe))) as executor:
+            futures = {
+                executor.submit(_probe, server_name): server_name
+                for server_name in to_probe
+            }
+            for future in as_completed(futures):
+                server_name = futures[future]
+                available = future.result()
+                health_status[server_name] = available
+                self._health_cache[server_name] = (available, time.monotonic())
+
         return health_status
     
     def get_server_tools(self, server_name: str) -> List[Dict[str, Any]]:
@@ -457,31 +641,28 @@ class MCPHandler:
             raise MCPConnectionError(f"Сервер '{server_name}' не найден")
         
         session = self._get_or_create_session(server_name)
-        
-        url = f"http://{server.host}:{server.port}{server.endpoint}"
-        
+
+        url = self._url_by_server[server_name]
+
         payload = {
             "jsonrpc": "2.0",
             "method": "tools/list",
             "params": {},
             "id": self._get_next_request_id()
         }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream",
-            "mcp-session-id": session.session_id
-        }
-        
+
+        headers = {**self._base_headers, "mcp-session-id": session.session_id}
+
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Явно устанавливаем кодировку UTF-8
-            response.encoding = 'utf-8'
-            
-            response_data = self._parse_sse_response(response.text)
-            
+            response = self._http.post(url, json=payload, headers=headers,
+                                       timeout=30, stream=True)
+            try:
+                response.raise_for_status()
+
+                response_data = self._parse_sse_response(response.iter_lines())
+            finally:
+                response.close()
+
             if not response_data:
                 raise MCPToolError("Не удалось распарсить ответ сервера")
             
@@ -496,7 +677,7 @@ class MCPHandler:
             for tool in tools:
                 tool_name = tool.get("name")
                 if tool_name and tool_name not in self._tool_to_server:
-                    self._tool_to_server[tool_name] = server_name
+                    self._tool_to_server[sys.intern(tool_name)] = server_name
             
             return tools
             
@@ -507,6 +688,12 @@ class MCPHandler:
         """Закрытие сессии с сервером."""
         self._sessions.pop(server_name, None)
 
+    def close(self) -> None:
+        """Освобождение HTTP-ресурсов (только собственной сессии)."""
+        self._sessions.clear()
+        if self._owns_http:
+            self._http.close()
+
 
 class MCPError(Exception):
     """Базовый класс ошибок MCP."""
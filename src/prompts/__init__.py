@@ -8,11 +8,19 @@
 """
 
 from .system_prompt import (
-    SYSTEM_PROMPT,
     get_system_prompt,
     format_tools_description,
 )
 
+
+def __getattr__(name: str) -> str:
+    """Ленивый реэкспорт SYSTEM_PROMPT — файл читается при первом обращении."""
+    if name == "SYSTEM_PROMPT":
+        from .system_prompt import SYSTEM_PROMPT
+        return SYSTEM_PROMPT
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __all__ = [
     "SYSTEM_PROMPT",
     "get_system_prompt",
@@ -11,7 +11,11 @@
 Системный промпт загружается из файла system_prompt.txt
 """
 
+import hashlib
+import json
 import os
+import re
+from functools import lru_cache
 from typing import List, Dict, Any
 
 
@@ -42,8 +46,33 @@ def _load_prompt_from_file(filename: str) -> str:
         raise IOError(f"Ошибка при чтении файла системного промпта: {e}")
 
 
-# Основной системный промпт (загружается из файла)
-SYSTEM_PROMPT = _load_prompt_from_file("system_prompt.txt")
+@lru_cache(maxsize=None)
+def _base_prompt() -> str:
+    """Базовый промпт: читается с диска один раз, при первом обращении."""
+    return _load_prompt_from_file("system_prompt.txt")
+
+
+def __getattr__(name: str) -> str:
+    """
+    Ленивый доступ к SYSTEM_PROMPT (PEP 562).
+
+    Файл промпта не читается при импорте модуля — только когда
+    атрибут действительно понадобился. Импорт модуля остаётся
+    дешёвым для кода, которому нужен, например, только
+    format_tools_description.
+    """
+    if name == "SYSTEM_PROMPT":
+        return _base_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Мемоизация собранных промптов: ключ — хэш схем инструментов.
+# Набор инструментов между ходами диалога практически не меняется,
+# так что многокилобайтная сборка заменяется на dict lookup.
+_RENDERED_CACHE: Dict[bytes, str] = {}
+
+# Следующий заголовок второго уровня (## , но не ###) — один линейный
+# проход по промпту вместо пересборки списка строк в цикле
+_NEXT_H2 = re.compile(r'\n## (?!#)')
 
 
 def get_system_prompt(tools_override: List[Dict[str, Any]] = None) -> str:
@@ -62,57 +91,70 @@ def get_system_prompt(tools_override: List[Dict[str, Any]] = None) -> str:
     - Вернуть финальный промпт с инструкциями по управлению проектом
     """
     # Всегда используем базовый промпт из system_prompt.txt
-    base_prompt = SYSTEM_PROMPT
-    
+    base_prompt = _base_prompt()
+
     if tools_override is None or len(tools_override) == 0:
         return base_prompt
-    
-    # Сгенерировать описание MCP инструментов
-    mcp_tools_description = format_tools_description(tools_override)
-    
-    # Найти и заменить секцию MCP инструментов в базовом промпте
+
+    # Мемоизация по хэшу схем: несериализуемые списки (например, моки)
+    # собираются без кэша
+    cache_key = None
+    try:
+        cache_key = hashlib.blake2b(
+            json.dumps(tools_override, sort_keys=True, default=str).encode(),
+            digest_size=16
+        ).digest()
+    except (TypeError, ValueError):
+        pass
+    if cache_key is not None:
+        cached = _RENDERED_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Сгенерировать описание MCP инструментов и вшить в промпт
+    rendered = _splice_tools_section(
+        base_prompt, format_tools_description(tools_override)
+    )
+    if cache_key is not None:
+        _RENDERED_CACHE[cache_key] = rendered
+    return rendered
+
+
+def _splice_tools_section(base_prompt: str, mcp_tools_description: str) -> str:
+    """
+    Вшивание описания инструментов в секцию MCP базового промпта.
+
+    Args:
+        base_prompt: Базовый текст промпта
+        mcp_tools_description: Отформатированное описание инструментов
+
+    Returns:
+        Промпт с заменённой секцией MCP инструментов (или с описанием,
+        добавленным в конец, если секция не найдена)
+    """
     # Ищем маркер начала секции MCP инструментов
     mcp_section_start = "### MCP инструменты"
-    
-    if mcp_section_start in base_prompt:
-        # Находим начало секции MCP инструментов
-        start_idx = base_prompt.find(mcp_section_start)
-        
-        # Находим конец секции MCP инструментов (следующий заголовок ##)
-        # Ищем следующий заголовок ## (но не ###)
-        remaining = base_prompt[start_idx:]
-        next_section_idx = None
-        
-        # Ищем следующий заголовок ## после секции MCP
-        for i, line in enumerate(remaining.split('\n')[1:], 1):  # Пропускаем заголовок секции
-            stripped = line.strip()
-            if stripped.startswith('## ') and not stripped.startswith('###'):
-                # Находим позицию этого заголовка в исходной строке
-                lines_before = remaining.split('\n')[:i]
-                next_section_idx = start_idx + len('\n'.join(lines_before))
-                break
-        
-        if next_section_idx:
-            # Заменяем секцию MCP инструментов
-            before = base_prompt[:start_idx + len(mcp_section_start)]
-            # Находим конец строки заголовка
-            header_end = base_prompt.find('\n', start_idx)
-            if header_end == -1:
-                header_end = len(base_prompt)
-            before = base_prompt[:header_end + 1]  # Включаем перенос строки
-            after = base_prompt[next_section_idx:]
-            return before + "\n" + mcp_tools_description + "\n\n" + after
-        else:
-            # Если не нашли следующий раздел, заменяем до конца
-            header_end = base_prompt.find('\n', start_idx)
-            if header_end == -1:
-                header_end = len(base_prompt)
-            before = base_prompt[:header_end + 1]
-            return before + "\n" + mcp_tools_description
-    
-    # Если секция MCP инструментов не найдена в базовом промпте,
-    # просто добавляем описание инструментов в конец
-    return base_prompt + "\n\n## ДОПОЛНИТЕЛЬНЫЕ ИНСТРУМЕНТЫ:\n\n" + mcp_tools_description
+    start_idx = base_prompt.find(mcp_section_start)
+
+    if start_idx == -1:
+        # Секция не найдена — добавляем описание инструментов в конец
+        return (base_prompt + "\n\n## ДОПОЛНИТЕЛЬНЫЕ ИНСТРУМЕНТЫ:\n\n"
+                + mcp_tools_description)
+
+    # Конец строки заголовка секции (включая перенос строки)
+    header_end = base_prompt.find('\n', start_idx)
+    if header_end == -1:
+        header_end = len(base_prompt)
+    before = base_prompt[:header_end + 1]
+
+    # Следующий заголовок ## (но не ###) — конец секции MCP инструментов
+    match = _NEXT_H2.search(base_prompt, start_idx + len(mcp_section_start))
+    if match:
+        after = base_prompt[match.start() + 1:]
+        return before + "\n" + mcp_tools_description + "\n\n" + after
+
+    # Если не нашли следующий раздел, заменяем до конца
+    return before + "\n" + mcp_tools_description
 
 
 def format_tools_description(tools: List[Dict[str, Any]]) -> str:
@@ -132,74 +174,122 @@ def format_tools_description(tools: List[Dict[str, Any]]) -> str:
         Форматированная строка с описанием всех инструментов
     """
     output = []
-    
+
     for i, tool in enumerate(tools, 1):
-        # Заголовок инструмента
-        output.append(f"### {i}. {tool['name']}")
-        output.append(f"**Описание:** {tool.get('description', 'Без описания')}")
-        output.append("**Параметры:**")
-        
-        # Определяем формат параметров
-        if 'inputSchema' in tool:
-            # MCP JSON Schema формат
-            schema = tool['inputSchema']
-            properties = schema.get('properties', {})
-            required_params = schema.get('required', [])
-            
-            if not properties:
-                output.append("- Нет параметров")
-            else:
-                for param_name, param_info in properties.items():
-                    is_required = param_name in required_params
-                    required_str = "(required)" if is_required else "(optional)"
-                    param_type = param_info.get('type', 'string')
-                    description = param_info.get('description', '')
-                    default = param_info.get('default')
-                    
-                    line = f"- {param_name} ({param_type}, {required_str}): {description}"
-                    if default is not None:
-                        line += f" [по умолчанию: {default}]"
-                    output.append(line)
+        # Блок без номера кэшируется: один и тот же инструмент
+        # встречается в разных наборах (локальные + MCP)
+        try:
+            key = json.dumps(tool, sort_keys=True)
+        except (TypeError, ValueError):
+            # Несериализуемый инструмент (например, мок) — без кэша
+            block = _render_tool_block(tool)
         else:
-            # Локальный формат или старый формат
-            params = tool.get('parameters', {})
-            
-            # Проверяем, является ли это JSON Schema в старом поле parameters
-            if params.get('type') == 'object' and 'properties' in params:
-                properties = params.get('properties', {})
-                required_params = params.get('required', [])
-                
-                if not properties:
-                    output.append("- Нет параметров")
-                else:
-                    for param_name, param_info in properties.items():
-                        is_required = param_name in required_params
-                        required_str = "(required)" if is_required else "(optional)"
-                        param_type = param_info.get('type', 'string')
-                        description = param_info.get('description', '')
-                        default = param_info.get('default')
-                        
-                        line = f"- {param_name} ({param_type}, {required_str}): {description}"
-                        if default is not None:
-                            line += f" [по умолчанию: {default}]"
-                        output.append(line)
-            elif not params:
-                output.append("- Нет параметров")
-            else:
-                # Старый локальный формат с прямыми параметрами
-                for param_name, param_info in params.items():
-                    required = "(required)" if param_info.get('required') else "(optional)"
-                    param_type = param_info.get('type', 'string')
-                    description = param_info.get('description', '')
-                    default = param_info.get('default')
-                    
-                    line = f"- {param_name} ({param_type}, {required}): {description}"
-                    if default is not None:
-                        line += f" [по умолчанию: {default}]"
-                    output.append(line)
-        
-        output.append("")  # Пустая строка между инструментами
-    
+            block = _render_tool_block_cached(key)
+        output.append(f"### {i}. {block}")
+
     return "\n".join(output)
 
 
+@lru_cache(maxsize=256)
+def _render_tool_block_cached(tool_json: str) -> str:
+    """
+    Мемоизированный рендер блока инструмента.
+
+    Args:
+        tool_json: Инструмент, сериализованный через json.dumps(sort_keys=True)
+
+    Returns:
+        Блок описания без порядкового номера
+    """
+    return _render_tool_block(json.loads(tool_json))
+
+
+def _render_tool_block(tool: Dict[str, Any]) -> str:
+    """
+    Рендер блока описания одного инструмента (без порядкового номера).
+
+    Args:
+        tool: Описание инструмента (локальный или MCP JSON Schema формат)
+
+    Returns:
+        Многострочный блок: имя, описание, параметры
+    """
+    output = [
+        tool['name'],
+        f"**Описание:** {tool.get('description', 'Без описания')}",
+        "**Параметры:**",
+    ]
+
+    # Определяем формат параметров
+    if 'inputSchema' in tool:
+        # MCP JSON Schema формат
+        schema = tool['inputSchema']
+        output.extend(_format_schema_params(
+            schema.get('properties', {}), schema.get('required', [])
+        ))
+    else:
+        # Локальный формат или старый формат
+        params = tool.get('parameters', {})
+
+        # Проверяем, является ли это JSON Schema в старом поле parameters
+        if params.get('type') == 'object' and 'properties' in params:
+            output.extend(_format_schema_params(
+                params.get('properties', {}), params.get('required', [])
+            ))
+        elif not params:
+            output.append("- Нет параметров")
+        else:
+            # Старый локальный формат с прямыми параметрами
+            output.extend(
+                _format_param_line(name, info, bool(info.get('required')))
+                for name, info in params.items()
+            )
+
+    output.append("")  # Пустая строка между инструментами
+
+    return "\n".join(output)
+
+
+def _format_schema_params(properties: Dict[str, Any],
+                          required_params: List[str]) -> List[str]:
+    """
+    Форматирование параметров из JSON Schema (properties/required).
+
+    Args:
+        properties: Схемы параметров {имя: описание}
+        required_params: Список имён обязательных параметров
+
+    Returns:
+        Список строк описания параметров
+    """
+    if not properties:
+        return ["- Нет параметров"]
+    return [
+        _format_param_line(name, info, name in required_params)
+        for name, info in properties.items()
+    ]
+
+
+def _format_param_line(param_name: str, param_info: Dict[str, Any],
+                       is_required: bool) -> str:
+    """
+    Форматирование одной строки описания параметра.
+
+    Args:
+        param_name: Имя параметра
+        param_info: Схема параметра (type/description/default)
+        is_required: Обязателен ли параметр
+
+    Returns:
+        Строка вида "- name (type, (required)): описание"
+    """
+    default = param_info.get('default')
+    # Одна f-строка вместо конкатенации — строка собирается за один проход
+    return (
+        f"- {param_name} ({param_info.get('type', 'string')}, "
+        f"{'(required)' if is_required else '(optional)'}): "
+        f"{param_info.get('description', '')}"
+        f"{f' [по умолчанию: {default}]' if default is not None else ''}"
+    )
+
+
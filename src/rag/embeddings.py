@@ -6,22 +6,67 @@
 - Преобразование текста в векторные представления
 """
 
+import hashlib
+import logging
+import random
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 from dataclasses import dataclass
 
+import numpy as np
 import requests
 
+try:
+    import orjson as _orjson  # Rust-парсер: в разы быстрее stdlib json
+except ImportError:
+    _orjson = None
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _read_json(response: 'requests.Response') -> dict:
+    """
+    Разбор JSON тела ответа.
+
+    Эмбединг-ответы — это большие массивы float; orjson разбирает
+    их в 3-10 раз быстрее, чем stdlib json внутри response.json().
+
+    Args:
+        response: HTTP ответ сервера
+
+    Returns:
+        Разобранный JSON
+
+    Raises:
+        ValueError: При невалидном JSON
+    """
+    content = response.content
+    if _orjson is not None and isinstance(content, (bytes, bytearray)):
+        return _orjson.loads(content)
+    return response.json()
+
+
+@dataclass(frozen=True, slots=True)
 class EmbeddingConfig:
-    """Конфигурация для генератора эмбедингов."""
+    """
+    Конфигурация для генератора эмбедингов.
+
+    frozen + slots: конфиг неизменяем, а доступ к полям идёт через
+    слоты вместо __dict__ — поля читаются на каждом запросе эмбединга.
+    """
     host: str
     port: int
     model_name: str
     endpoint: str
     timeout: int = 30
     retry_attempts: int = 3
+    concurrency: int = 8  # параллельных запросов в generate_batch
+    batch_endpoint: str = "/api/embed"  # мультитекстовый эндпоинт Ollama
 
 
 class EmbeddingGenerator:
@@ -33,55 +78,200 @@ class EmbeddingGenerator:
     - Генерацию эмбедингов для текстовых чанков
     - Батчевую обработку для эффективности
     """
-    
-    def __init__(self, config: EmbeddingConfig) -> None:
+
+    # Ёмкость кэша эмбедингов по хэшу текста. Эмбединги детерминированы,
+    # поэтому TTL не нужен — только LRU-вытеснение по размеру
+    _CACHE_SIZE = 2048
+
+    # Сколько текстов отправлять в одном запросе к batch_endpoint
+    _BATCH_SIZE = 32
+
+    def __init__(self, config: EmbeddingConfig,
+                 session: Optional['requests.Session'] = None) -> None:
         """
         Инициализация генератора.
-        
+
         Args:
             config: Конфигурация подключения к LLM
+            session: Общая HTTP сессия с пулом соединений (keep-alive);
+                None — генератор создаёт собственную сессию
         """
         self._config = config
         self._base_url = f"http://{config.host}:{config.port}{config.endpoint}"
         self._embedding_dim: Optional[int] = None
+        # Кэш по хэшу текста: дубликаты (заголовки, boilerplate,
+        # повторные запросы) не ходят к LLM второй раз
+        self._cache: 'OrderedDict[bytes, np.ndarray]' = OrderedDict()
+        # None — поддержка batch_endpoint ещё не проверялась;
+        # False — сервер ответил 404, больше не пробуем
+        self._batch_supported: Optional[bool] = None
+        if session is not None:
+            self._session = session
+            self._owns_session = False
+        else:
+            # Собственная сессия: без keep-alive каждый эмбединг платит
+            # TCP-рукопожатием даже к localhost
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=16, pool_maxsize=16
+            )
+            self._session.mount('http://', adapter)
+            self._owns_session = True
     
-    def generate(self, text: str) -> List[float]:
+    @property
+    def model_name(self) -> str:
+        """Имя эмбединг-модели (входит в ключи внешних кэшей)."""
+        return self._config.model_name
+
+    def generate(self, text: str) -> np.ndarray:
         """
         Генерация эмбединга для одного текста.
-        
+
         Args:
             text: Текст для преобразования
-            
+
         Returns:
-            Вектор эмбединга (список float)
-            
+            Вектор эмбединга (np.ndarray, float32, единичной длины)
+
         Raises:
             EmbeddingError: При ошибке генерации
         """
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            # Копия: вызывающий код может нормализовать вектор на месте
+            return cached.copy()
+
         response = self._retry_with_backoff(self._send_request, text)
-        return self._parse_embedding(response)
+        embedding = self._parse_embedding(response)
+        self._store_in_cache(text, embedding)
+        return embedding
     
-    def generate_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_batch(self, texts: List[str]) -> List[np.ndarray]:
         """
         Батчевая генерация эмбедингов.
-        
+
         Args:
             texts: Список текстов
-            
+
         Returns:
-            Список эмбедингов (в том же порядке)
-        
+            Список эмбедингов float32 (в том же порядке)
+
         Note:
-            Ollama не поддерживает батчевые запросы напрямую,
-            поэтому обрабатываем по одному.
+            Ollama >= 0.2 принимает несколько текстов за один запрос
+            (batch_endpoint, поле "input") — N round-trip'ов
+            превращаются в N / _BATCH_SIZE. На старых серверах (404)
+            фоллбэк: K параллельных однотекстовых запросов
+            (K = config.concurrency).
         """
-        embeddings: List[List[float]] = []
+        if not texts:
+            return []
+
+        # Сначала закрываем кэш-хиты, к серверу идут только промахи
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        miss_indices: List[int] = []
         for i, text in enumerate(texts):
-            print(f"Генерация эмбединга {i+1}/{len(texts)}...")
-            embedding = self.generate(text)
-            embeddings.append(embedding)
-        return embeddings
+            key = hashlib.blake2b(
+                text.encode('utf-8'), digest_size=16
+            ).digest()
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                results[i] = cached.copy()
+            else:
+                miss_indices.append(i)
+
+        if not miss_indices:
+            return results
+
+        miss_texts = [texts[i] for i in miss_indices]
+        if self._batch_supported is not False:
+            # Неудача здесь не приговор: флаг опускает только 404
+            # (внутри _generate_batch_server), остальные ошибки —
+            # преходящие, следующий батч попробует эндпоинт снова
+            vectors = self._generate_batch_server(miss_texts)
+            if vectors is not None:
+                self._batch_supported = True
+                for i, vector in zip(miss_indices, vectors):
+                    self._store_in_cache(texts[i], vector)
+                    results[i] = vector
+                return results
+
+        workers = min(max(self._config.concurrency, 1), len(miss_texts))
+        if workers == 1:
+            print(f"Генерация {len(miss_texts)} эмбедингов...")
+            for n, i in enumerate(miss_indices):
+                # print на каждый эмбединг — это syscall и flush stdout
+                # в горячем цикле; прогресс ушёл на уровень DEBUG
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("эмбединг %d/%d", n + 1, len(miss_texts))
+                results[i] = self.generate(texts[i])
+            return results
+
+        print(f"Генерация {len(miss_texts)} эмбедингов "
+              f"({workers} параллельно)...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # executor.map сохраняет порядок исходных текстов
+            for i, vector in zip(miss_indices,
+                                 executor.map(self.generate, miss_texts)):
+                results[i] = vector
+        return results
+
+    def _generate_batch_server(
+            self, texts: List[str]) -> Optional[List[np.ndarray]]:
+        """
+        Батчевая генерация через мультитекстовый эндпоинт сервера.
+
+        Args:
+            texts: Тексты для эмбединга
+
+        Returns:
+            Список векторов float32 или None при любой ошибке.
+            404 дополнительно опускает _batch_supported: эндпоинта на
+            этом сервере нет, и повторные пробы бессмысленны. Прочие
+            ошибки (сеть, 5xx) считаются преходящими.
+        """
+        url = (f"http://{self._config.host}:{self._config.port}"
+               f"{self._config.batch_endpoint}")
+        vectors: List[np.ndarray] = []
+        for start in range(0, len(texts), self._BATCH_SIZE):
+            chunk = texts[start:start + self._BATCH_SIZE]
+            try:
+                response = self._post_json(
+                    url, {"model": self._config.model_name, "input": chunk}
+                )
+            except requests.exceptions.RequestException:
+                return None
+            if response.status_code == 404:
+                self._batch_supported = False
+                return None
+            if response.status_code != 200:
+                return None
+            try:
+                embeddings = _read_json(response).get("embeddings")
+            except ValueError:
+                return None
+            if (not isinstance(embeddings, list)
+                    or len(embeddings) != len(chunk)):
+                return None
+            vectors.extend(
+                self._to_unit_vector(e) for e in embeddings
+            )
+        return vectors
+
+    def _store_in_cache(self, text: str, embedding: np.ndarray) -> None:
+        """Сохранение эмбединга в LRU-кэш по хэшу текста."""
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        self._cache[key] = embedding.copy()
+        while len(self._cache) > self._CACHE_SIZE:
+            self._cache.popitem(last=False)
     
+    def close(self) -> None:
+        """Освобождение HTTP-ресурсов (только собственной сессии)."""
+        if self._owns_session:
+            self._session.close()
+
     def check_model_availability(self) -> bool:
         """
         Проверка доступности модели.
@@ -101,13 +291,72 @@ class EmbeddingGenerator:
         
         Returns:
             Размерность вектора эмбединга
+
+        Note:
+            Сначала спрашивает метаданные модели (/api/show) — это
+            дешевле, чем прогонять инференс тестового эмбединга на
+            холодном старте. Фоллбэк на generate("test"), если
+            метаданные недоступны.
         """
         if self._embedding_dim is not None:
             return self._embedding_dim
-        
-        self._embedding_dim = len(self.generate("test"))
+
+        dim = self._query_embedding_dim()
+        if dim is None:
+            dim = len(self.generate("test"))
+        self._embedding_dim = dim
         return self._embedding_dim
+
+    def _query_embedding_dim(self) -> Optional[int]:
+        """
+        Запрос размерности эмбединга из метаданных модели.
+
+        Ollama отдаёт в /api/show поле model_info с ключом
+        '<архитектура>.embedding_length' для эмбединг-моделей.
+
+        Returns:
+            Размерность или None, если метаданные недоступны
+        """
+        url = f"http://{self._config.host}:{self._config.port}/api/show"
+        try:
+            response = self._post_json(url, {"name": self._config.model_name})
+            if response.status_code != 200:
+                return None
+            model_info = _read_json(response).get("model_info") or {}
+            for key, value in model_info.items():
+                if key.endswith(".embedding_length"):
+                    return int(value)
+        except (requests.exceptions.RequestException,
+                ValueError, TypeError, AttributeError):
+            return None
+        return None
     
+    def _post_json(self, url: str, payload: dict) -> 'requests.Response':
+        """
+        POST с JSON телом.
+
+        Сериализация через orjson, когда он доступен: requests внутри
+        json= гоняет payload через stdlib json.dumps плюс отдельный
+        UTF-8 encode, orjson отдаёт bytes сразу и в разы быстрее.
+
+        Args:
+            url: Адрес эндпоинта
+            payload: Тело запроса
+
+        Returns:
+            HTTP ответ
+        """
+        if _orjson is not None:
+            return self._session.post(
+                url,
+                data=_orjson.dumps(payload),
+                headers=_JSON_HEADERS,
+                timeout=self._config.timeout
+            )
+        return self._session.post(
+            url, json=payload, timeout=self._config.timeout
+        )
+
     def _send_request(self, text: str) -> dict:
         """
         Отправка запроса к API локальной LLM.
@@ -127,37 +376,62 @@ class EmbeddingGenerator:
         }
         
         try:
-            response = requests.post(
-                self._base_url,
-                json=payload,
-                timeout=self._config.timeout
-            )
+            # Сессия переиспользует TCP соединение между запросами
+            response = self._post_json(self._base_url, payload)
         except requests.exceptions.ConnectionError:
             raise EmbeddingConnectionError("Не удалось подключиться к LLM")
         except requests.exceptions.Timeout:
             raise EmbeddingConnectionError("Таймаут подключения к LLM")
         
         if response.status_code != 200:
-            raise EmbeddingConnectionError(f"Ошибка API: {response.status_code}")
-        
-        return response.json()
+            retry_after = None
+            if response.status_code in (429, 503):
+                # Сервер сам сказал, когда приходить — передаём в retry
+                try:
+                    retry_after = float(response.headers.get('Retry-After'))
+                except (TypeError, ValueError):
+                    pass
+            raise EmbeddingConnectionError(
+                f"Ошибка API: {response.status_code}", retry_after=retry_after
+            )
+
+        return _read_json(response)
     
-    def _parse_embedding(self, response: dict) -> List[float]:
+    def _parse_embedding(self, response: dict) -> np.ndarray:
         """
         Извлечение эмбединга из ответа API.
-        
+
         Args:
             response: JSON ответ от API
-            
+
         Returns:
-            Вектор эмбединга
-            
+            Вектор эмбединга (float32 ndarray, L2-нормированный —
+            косинусное сходство внизу по стеку сводится к скалярному
+            произведению без вычисления норм на каждый запрос)
+
         Raises:
             EmbeddingParseError: При неожиданном формате ответа
         """
         if "embedding" not in response:
             raise EmbeddingParseError("Отсутствует поле 'embedding' в ответе")
-        return response["embedding"]
+        return self._to_unit_vector(response["embedding"])
+
+    @staticmethod
+    def _to_unit_vector(values) -> np.ndarray:
+        """
+        Преобразование в единичный float32 вектор.
+
+        Args:
+            values: Сырой вектор (список float или ndarray)
+
+        Returns:
+            L2-нормированный ndarray (нулевой вектор — без изменений)
+        """
+        vec = np.asarray(values, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec = vec / norm
+        return vec
     
     def _retry_with_backoff(self, func: callable, *args, **kwargs):
         """
@@ -180,8 +454,12 @@ class EmbeddingGenerator:
             except EmbeddingConnectionError as e:
                 if attempt == max_attempts - 1:
                     raise
-                wait_time = 2 ** attempt  # 1, 2, 4 секунды
-                print(f"Попытка {attempt + 1} не удалась. Ожидание {wait_time}с...")
+                # Джиттер ±25% разводит параллельные воркеры по времени,
+                # чтобы после общего сбоя они не ломились к LLM разом
+                wait_time = (2 ** attempt) * (0.75 + 0.5 * random.random())
+                if e.retry_after is not None:
+                    wait_time = max(wait_time, e.retry_after)
+                print(f"Попытка {attempt + 1} не удалась. Ожидание {wait_time:.1f}с...")
                 time.sleep(wait_time)
 
 
@@ -191,8 +469,18 @@ class EmbeddingError(Exception):
 
 
 class EmbeddingConnectionError(EmbeddingError):
-    """Ошибка подключения к LLM."""
-    pass
+    """
+    Ошибка подключения к LLM.
+
+    Attributes:
+        retry_after: Рекомендованная сервером пауза перед повтором
+            (из заголовка Retry-After при 429/503), в секундах
+    """
+
+    def __init__(self, message: str,
+                 retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
 
 
 class EmbeddingParseError(EmbeddingError):
@@ -14,6 +14,19 @@ from dataclasses import dataclass
 
 import numpy as np
 
+try:
+    # Быстрый JSON парсер: индекс эмбедингов — самый большой файл проекта
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # SIMD-ускоренный поиск по inner product (опционально);
+    # без faiss используется векторизованный numpy-поиск
+    import faiss
+except ImportError:
+    faiss = None
+
 if TYPE_CHECKING:
     from .embeddings import EmbeddingGenerator
 
@@ -39,7 +52,9 @@ class DocumentRetriever:
     """
     
     DEFAULT_TOP_K = 3
-    
+    # Порог, с которого бинарный сайдкар матрицы окупает себя
+    _SIDECAR_MIN_CHUNKS = 256
+
     def __init__(self, embeddings_path: str, 
                  embedding_generator: 'EmbeddingGenerator') -> None:
         """
@@ -58,6 +73,15 @@ class DocumentRetriever:
         self._embedding_generator = embedding_generator
         self._index: Optional[dict] = None
         self._index_mtime: Optional[float] = None
+        # Матрица L2-нормированных эмбедингов (строится лениво из чанков)
+        # и, при наличии faiss, IndexFlatIP поверх неё
+        self._matrix: Optional[np.ndarray] = None
+        self._faiss_index = None
+        # Бинарный сайдкар с int8-квантованной матрицей: тёплый старт
+        # пропускает конвертацию списков из JSON (файл в 4 раза меньше)
+        self._sidecar_path = embeddings_path + ".q8.npz"
+        # Float32 матрица, записанная индексатором вместе с JSON
+        self._dense_path = embeddings_path + ".npy"
     
     def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[SearchResult]:
         """
@@ -83,16 +107,10 @@ class DocumentRetriever:
         
         # Сгенерируй эмбединг запроса
         query_embedding = self._embedding_generator.generate(query)
-        
-        # Вычисли сходство со всеми чанками
-        similarities = self._compute_all_similarities(query_embedding)
-        
-        # Отсортируй по убыванию сходства
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        
-        # Возьми топ-K результатов
-        top_results = similarities[:top_k]
-        
+
+        # Топ-K по косинусному сходству (faiss либо numpy)
+        top_results = self._top_k_similarities(query_embedding, top_k)
+
         # Сформируй SearchResult для каждого
         results = []
         for idx, score in top_results:
@@ -106,6 +124,49 @@ class DocumentRetriever:
             ))
         return results
     
+    def search_batch(self, queries: List[str],
+                     top_k: int = DEFAULT_TOP_K) -> List[List[SearchResult]]:
+        """
+        Поиск релевантных чанков для нескольких запросов за один проход.
+
+        Все эмбединги запросов вычисляются одним обращением к серверу,
+        что амортизирует сетевой round-trip по сравнению с N вызовами
+        search().
+
+        Args:
+            queries: Список поисковых запросов
+            top_k: Количество результатов на запрос (по умолчанию 3)
+
+        Returns:
+            Список списков SearchResult — по одному на запрос,
+            в порядке исходных запросов
+        """
+        if not queries:
+            return []
+
+        # Проверь и загрузи индекс
+        self._reload_index_if_needed()
+        if self._index is None:
+            raise IndexNotFoundError("Индекс не найден. Запустите /index")
+
+        # Один запрос к embedding-серверу на весь батч
+        query_embeddings = self._embedding_generator.generate_batch(queries)
+
+        batch_results = []
+        for query_embedding in query_embeddings:
+            results = []
+            for idx, score in self._top_k_similarities(query_embedding, top_k):
+                chunk = self._index["chunks"][idx]
+                results.append(SearchResult(
+                    chunk_id=chunk["id"],
+                    text=chunk["text"],
+                    source_file=chunk["source"],
+                    similarity_score=score,
+                    position=chunk["position"]
+                ))
+            batch_results.append(results)
+        return batch_results
+
     def load_index(self) -> bool:
         """
         Загрузка индекса в память.
@@ -120,9 +181,10 @@ class DocumentRetriever:
         if not os.path.exists(self._embeddings_path):
             return False
         
-        # Загрузи JSON
-        with open(self._embeddings_path, 'r', encoding='utf-8') as f:
-            self._index = json.load(f)
+        # Загрузи JSON (orjson парсит большой индекс в разы быстрее)
+        with open(self._embeddings_path, 'rb') as f:
+            data = f.read()
+        self._index = orjson.loads(data) if orjson is not None else json.loads(data)
         
         # Проверь наличие чанков
         if not self._index.get("chunks"):
@@ -130,6 +192,10 @@ class DocumentRetriever:
         
         # Сохрани время модификации
         self._index_mtime = os.path.getmtime(self._embeddings_path)
+
+        # Сбрось производные структуры — перестроятся при первом поиске
+        self._matrix = None
+        self._faiss_index = None
         return True
     
     def is_index_loaded(self) -> bool:
@@ -218,6 +284,162 @@ class DocumentRetriever:
         
         return float(dot_product / (norm1 * norm2))
     
+    def _ensure_matrix(self) -> None:
+        """
+        Ленивое построение матрицы эмбедингов из загруженного индекса.
+
+        Эмбединги всех чанков складываются в float32 матрицу и
+        L2-нормируются построчно, так что косинусное сходство сводится
+        к inner product. При наличии faiss поверх матрицы строится
+        IndexFlatIP (SIMD-ускоренный точный поиск).
+        """
+        if self._matrix is not None:
+            return
+
+        matrix = self._load_dense_matrix()
+        if matrix is None:
+            matrix = self._load_matrix_sidecar()
+        if matrix is None:
+            matrix = np.asarray(
+                [chunk["embedding"] for chunk in self._index["chunks"]],
+                dtype=np.float32
+            )
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            # Нулевые векторы оставляем нулевыми (сходство 0 с чем угодно)
+            np.divide(matrix, norms, out=matrix, where=norms != 0)
+            self._save_matrix_sidecar(matrix)
+        self._matrix = matrix
+
+        if faiss is not None and matrix.size:
+            index = faiss.IndexFlatIP(matrix.shape[1])
+            index.add(matrix)
+            self._faiss_index = index
+
+    def _load_dense_matrix(self) -> Optional[np.ndarray]:
+        """
+        Загрузка float32 матрицы, записанной индексатором рядом с JSON.
+
+        Бинарное чтение вместо разбора float-списков из JSON. Матрица
+        валидна, только если файл не старше JSON-индекса и число строк
+        совпадает с числом чанков.
+
+        Returns:
+            L2-нормированная float32 матрица или None
+        """
+        try:
+            if (self._index_mtime is None
+                    or os.path.getmtime(self._dense_path) < self._index_mtime):
+                return None
+            matrix = np.load(self._dense_path)
+        except (OSError, ValueError):
+            return None
+
+        if (matrix.dtype != np.float32 or matrix.ndim != 2
+                or matrix.shape[0] != len(self._index["chunks"])):
+            return None
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms != 0)
+        return matrix
+
+    def _load_matrix_sidecar(self) -> Optional[np.ndarray]:
+        """
+        Загрузка квантованной матрицы эмбедингов из бинарного сайдкара.
+
+        Сайдкар хранит матрицу как int8 (симметричная квантизация с
+        индивидуальной шкалой на строку: scale = max|row| / 127, что
+        использует весь диапазон кодов для каждого вектора). Валиден,
+        только если он не старше JSON-индекса и число строк совпадает
+        с числом чанков.
+
+        Returns:
+            Матрица float32 или None, если сайдкар отсутствует/устарел
+        """
+        try:
+            if (self._index_mtime is None
+                    or os.path.getmtime(self._sidecar_path) < self._index_mtime):
+                return None
+            with np.load(self._sidecar_path) as archive:
+                codes = archive["codes"]
+                scales = archive["scales"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if (codes.dtype != np.int8 or codes.ndim != 2
+                or codes.shape[0] != len(self._index["chunks"])
+                or scales.shape != (codes.shape[0],)):
+            return None
+        matrix = codes.astype(np.float32) * scales[:, None]
+        # Деквантизация слегка сбивает длину — возвращаем строки к единичной
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms != 0)
+        return matrix
+
+    def _save_matrix_sidecar(self, matrix: np.ndarray) -> None:
+        """
+        Атомарная запись int8-сайдкара матрицы эмбедингов.
+
+        Args:
+            matrix: Нормированная float32 матрица
+
+        Ошибки записи не фатальны: сайдкар — только ускорение загрузки.
+        Для маленьких индексов (меньше _SIDECAR_MIN_CHUNKS строк)
+        конвертация из JSON и так мгновенна — файл не создаётся.
+        """
+        if matrix.shape[0] < self._SIDECAR_MIN_CHUNKS:
+            return
+        try:
+            # Шкала на строку: каждый вектор занимает весь диапазон int8,
+            # ошибка квантизации меньше, чем при общей шкале 1/127
+            scales = np.abs(matrix).max(axis=1).astype(np.float32) / 127.0
+            safe = np.where(scales > 0, scales, 1.0)
+            codes = np.clip(
+                np.rint(matrix / safe[:, None]), -127, 127
+            ).astype(np.int8)
+            tmp_path = f"{self._sidecar_path}.tmp.{os.getpid()}"
+            np.savez(tmp_path, codes=codes, scales=scales)
+            # np.savez дописывает .npz к имени без расширения
+            os.replace(f"{tmp_path}.npz", self._sidecar_path)
+        except OSError:
+            pass
+
+    def _top_k_similarities(self, query_embedding: List[float],
+                            top_k: int) -> List[Tuple[int, float]]:
+        """
+        Топ-K чанков по косинусному сходству с запросом.
+
+        Args:
+            query_embedding: Эмбединг запроса
+            top_k: Количество результатов
+
+        Returns:
+            Список кортежей (индекс_чанка, сходство) по убыванию сходства
+        """
+        self._ensure_matrix()
+        if self._matrix is None or not self._matrix.size or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if self._faiss_index is not None:
+            scores, indices = self._faiss_index.search(
+                query.reshape(1, -1), min(top_k, self._matrix.shape[0])
+            )
+            return [
+                (int(idx), float(score))
+                for idx, score in zip(indices[0], scores[0])
+                if idx >= 0
+            ]
+
+        # Векторизованный фолбэк: одно матрично-векторное произведение
+        scores = self._matrix @ query
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(idx), float(scores[idx])) for idx in top]
+
     def _compute_all_similarities(self, query_embedding: List[float]) -> List[Tuple[int, float]]:
         """
         Вычисление сходства запроса со всеми чанками.
@@ -228,14 +450,18 @@ class DocumentRetriever:
         Returns:
             Список кортежей (индекс_чанка, сходство)
         """
-        similarities = []
-        for idx, chunk in enumerate(self._index["chunks"]):
-            similarity = self._compute_cosine_similarity(
-                query_embedding,
-                chunk["embedding"]
-            )
-            similarities.append((idx, similarity))
-        return similarities
+        self._ensure_matrix()
+        if self._matrix is None or not self._matrix.size:
+            return []
+
+        # Одно матрично-векторное умножение (BLAS) вместо питоновского
+        # цикла с пересчётом норм на каждый чанк
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+        scores = self._matrix @ query
+        return [(idx, float(score)) for idx, score in enumerate(scores)]
     
     def _reload_index_if_needed(self) -> None:
         """
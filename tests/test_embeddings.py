@@ -7,6 +7,27 @@ from unittest.mock import patch, Mock
 import sys
 import os
 
+import json as jsonlib
+
+import numpy as np
+
+
+def _sent_payload(json=None, data=None, **_kwargs):
+    """Тело запроса из kwargs замоканного Session.post.
+
+    Генератор шлёт либо json=dict (stdlib), либо data=bytes (orjson) —
+    тесты не должны зависеть от того, установлен ли orjson.
+    """
+    if json is not None:
+        return json
+    return jsonlib.loads(data)
+
+
+def _unit(values):
+    """L2-нормированный float32 вектор — как возвращает генератор."""
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
 # Добавляем путь к src для импорта
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -73,7 +94,7 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         )
         self.assertIsNone(self.generator._embedding_dim)
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_send_request_success(self, mock_post):
         """Проверка успешного запроса."""
         mock_response = Mock()
@@ -84,13 +105,16 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         result = self.generator._send_request("test text")
         
         self.assertEqual(result, {"embedding": [0.1, 0.2, 0.3]})
-        mock_post.assert_called_once_with(
-            "http://localhost:11434/api/embeddings",
-            json={"model": "mxbai-embed-large", "prompt": "test text"},
-            timeout=30
+        self.assertEqual(mock_post.call_count, 1)
+        args, kwargs = mock_post.call_args
+        self.assertEqual(args[0], "http://localhost:11434/api/embeddings")
+        self.assertEqual(kwargs["timeout"], 30)
+        self.assertEqual(
+            _sent_payload(**kwargs),
+            {"model": "mxbai-embed-large", "prompt": "test text"}
         )
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_send_request_connection_error(self, mock_post):
         """Проверка обработки ошибки подключения."""
         import requests
@@ -101,7 +125,7 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         
         self.assertIn("Не удалось подключиться", str(context.exception))
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_send_request_timeout(self, mock_post):
         """Проверка обработки таймаута."""
         import requests
@@ -112,7 +136,7 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         
         self.assertIn("Таймаут", str(context.exception))
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_send_request_api_error(self, mock_post):
         """Проверка обработки ошибки API."""
         mock_response = Mock()
@@ -128,7 +152,12 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         """Проверка успешного парсинга эмбединга."""
         response = {"embedding": [0.1, 0.2, 0.3, 0.4, 0.5]}
         result = self.generator._parse_embedding(response)
-        self.assertEqual(result, [0.1, 0.2, 0.3, 0.4, 0.5])
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_array_almost_equal(
+            result, _unit([0.1, 0.2, 0.3, 0.4, 0.5])
+        )
+        self.assertAlmostEqual(float(np.linalg.norm(result)), 1.0, places=5)
     
     def test_parse_embedding_missing_field(self):
         """Проверка обработки отсутствующего поля."""
@@ -139,7 +168,7 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         
         self.assertIn("embedding", str(context.exception))
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_generate_success(self, mock_post):
         """Проверка успешной генерации эмбединга."""
         mock_response = Mock()
@@ -148,29 +177,96 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         mock_post.return_value = mock_response
         
         result = self.generator.generate("test text")
-        
-        self.assertEqual(result, [0.1, 0.2, 0.3])
+
+        self.assertIsInstance(result, np.ndarray)
+        np.testing.assert_array_almost_equal(result, _unit([0.1, 0.2, 0.3]))
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_generate_batch(self, mock_post):
-        """Проверка батчевой генерации."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.side_effect = [
-            {"embedding": [0.1, 0.2]},
-            {"embedding": [0.3, 0.4]},
-            {"embedding": [0.5, 0.6]},
-        ]
-        mock_post.return_value = mock_response
-        
+        """Проверка батчевой генерации через мультитекстовый эндпоинт."""
+        embeddings_by_text = {
+            "text1": [0.1, 0.2],
+            "text2": [0.3, 0.4],
+            "text3": [0.5, 0.6],
+        }
+
+        def fake_post(url, **kwargs):
+            payload = _sent_payload(**kwargs)
+            response = Mock()
+            response.status_code = 200
+            response.json.return_value = {
+                "embeddings": [embeddings_by_text[t]
+                               for t in payload["input"]]
+            }
+            return response
+
+        mock_post.side_effect = fake_post
+
         result = self.generator.generate_batch(["text1", "text2", "text3"])
-        
+
         self.assertEqual(len(result), 3)
-        self.assertEqual(result[0], [0.1, 0.2])
-        self.assertEqual(result[1], [0.3, 0.4])
-        self.assertEqual(result[2], [0.5, 0.6])
+        np.testing.assert_array_almost_equal(result[0], _unit([0.1, 0.2]))
+        np.testing.assert_array_almost_equal(result[1], _unit([0.3, 0.4]))
+        np.testing.assert_array_almost_equal(result[2], _unit([0.5, 0.6]))
+        # Весь батч ушёл одним запросом
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch('rag.embeddings.requests.Session.post')
+    def test_generate_batch_fallback(self, mock_post):
+        """Фоллбэк на однотекстовые запросы, если эндпоинта нет (404)."""
+        # Ответ привязан к тексту запроса: фоллбэк выполняется
+        # параллельно, порядок обращений к серверу не гарантирован
+        embeddings_by_text = {
+            "text1": [0.1, 0.2],
+            "text2": [0.3, 0.4],
+        }
+
+        def fake_post(url, **kwargs):
+            payload = _sent_payload(**kwargs)
+            response = Mock()
+            if "input" in payload:
+                response.status_code = 404
+                return response
+            response.status_code = 200
+            response.json.return_value = {
+                "embedding": embeddings_by_text[payload["prompt"]]
+            }
+            return response
+
+        mock_post.side_effect = fake_post
+
+        result = self.generator.generate_batch(["text1", "text2"])
+
+        self.assertEqual(len(result), 2)
+        np.testing.assert_array_almost_equal(result[0], _unit([0.1, 0.2]))
+        np.testing.assert_array_almost_equal(result[1], _unit([0.3, 0.4]))
+        # 404 запоминается: батч-эндпоинт больше не пробуется
+        self.assertIs(self.generator._batch_supported, False)
+
+    @patch('rag.embeddings.requests.Session.post')
+    def test_generate_batch_transient_error_not_latched(self, mock_post):
+        """Временная ошибка (5xx) не отключает батч-эндпоинт навсегда."""
+
+        def fake_post(url, **kwargs):
+            payload = _sent_payload(**kwargs)
+            response = Mock()
+            if "input" in payload:
+                response.status_code = 500
+                return response
+            response.status_code = 200
+            response.json.return_value = {"embedding": [0.1, 0.2]}
+            return response
+
+        mock_post.side_effect = fake_post
+
+        result = self.generator.generate_batch(["text1"])
+
+        self.assertEqual(len(result), 1)
+        # Фоллбэк отработал, но флаг не опущен — следующий батч
+        # снова попробует серверный эндпоинт
+        self.assertIsNone(self.generator._batch_supported)
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_check_model_availability_true(self, mock_post):
         """Проверка доступности модели - успех."""
         mock_response = Mock()
@@ -182,7 +278,7 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         
         self.assertTrue(result)
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_check_model_availability_false(self, mock_post):
         """Проверка доступности модели - неудача."""
         import requests
@@ -192,28 +288,57 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         
         self.assertFalse(result)
     
-    @patch('rag.embeddings.requests.post')
+    @patch('rag.embeddings.requests.Session.post')
     def test_get_embedding_dimension(self, mock_post):
-        """Проверка получения размерности эмбединга."""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"embedding": [0.1] * 1024}
-        mock_post.return_value = mock_response
-        
+        """Проверка получения размерности из метаданных модели."""
+
+        def fake_post(url, **kwargs):
+            response = Mock()
+            response.status_code = 200
+            if url.endswith("/api/show"):
+                response.json.return_value = {
+                    "model_info": {"bert.embedding_length": 1024}
+                }
+            else:
+                response.json.return_value = {"embedding": [0.1] * 1024}
+            return response
+
+        mock_post.side_effect = fake_post
+
         dim = self.generator.get_embedding_dimension()
-        
+
         self.assertEqual(dim, 1024)
         self.assertEqual(self.generator._embedding_dim, 1024)
-        
+
         # Второй вызов должен использовать кэш
         dim2 = self.generator.get_embedding_dimension()
         self.assertEqual(dim2, 1024)
         # Проверяем, что запрос был только один раз
         self.assertEqual(mock_post.call_count, 1)
+
+    @patch('rag.embeddings.requests.Session.post')
+    def test_get_embedding_dimension_fallback(self, mock_post):
+        """Фоллбэк на тестовый эмбединг, если метаданные недоступны."""
+
+        def fake_post(url, **kwargs):
+            response = Mock()
+            if url.endswith("/api/show"):
+                response.status_code = 404
+            else:
+                response.status_code = 200
+                response.json.return_value = {"embedding": [0.1] * 512}
+            return response
+
+        mock_post.side_effect = fake_post
+
+        dim = self.generator.get_embedding_dimension()
+
+        self.assertEqual(dim, 512)
     
+    @patch('rag.embeddings.random.random', return_value=0.5)
     @patch('rag.embeddings.time.sleep')
-    @patch('rag.embeddings.requests.post')
-    def test_retry_with_backoff(self, mock_post, mock_sleep):
+    @patch('rag.embeddings.requests.Session.post')
+    def test_retry_with_backoff(self, mock_post, mock_sleep, mock_random):
         """Проверка retry с экспоненциальным backoff."""
         import requests
         
@@ -229,8 +354,8 @@ class TestEmbeddingGeneratorUnit(unittest.TestCase):
         ]
         
         result = self.generator.generate("test")
-        
-        self.assertEqual(result, [0.1])
+
+        np.testing.assert_array_almost_equal(result, _unit([0.1]))
         self.assertEqual(mock_post.call_count, 3)
         # Проверяем вызовы sleep с правильными задержками
         self.assertEqual(mock_sleep.call_count, 2)
@@ -268,10 +393,10 @@ class TestEmbeddingGeneratorIntegration(unittest.TestCase):
     def test_generate_real_embedding(self):
         """Тест генерации реального эмбединга."""
         embedding = self.generator.generate("Привет мир")
-        
-        self.assertIsInstance(embedding, list)
+
+        self.assertIsInstance(embedding, np.ndarray)
         self.assertGreater(len(embedding), 0)
-        self.assertTrue(all(isinstance(x, float) for x in embedding))
+        self.assertEqual(embedding.dtype, np.float32)
         
         print(f"\n✓ Размерность эмбединга: {len(embedding)}")
         print(f"✓ Первые 5 значений: {embedding[:5]}")
@@ -283,7 +408,7 @@ class TestEmbeddingGeneratorIntegration(unittest.TestCase):
         
         self.assertEqual(len(embeddings), 3)
         for emb in embeddings:
-            self.assertIsInstance(emb, list)
+            self.assertIsInstance(emb, np.ndarray)
             self.assertGreater(len(emb), 0)
         
         # Все эмбединги должны иметь одинаковую размерность
@@ -308,7 +433,7 @@ class TestEmbeddingGeneratorIntegration(unittest.TestCase):
         emb2 = self.generator.generate("Собака бежит по улице")
         
         # Эмбединги не должны быть идентичными
-        self.assertNotEqual(emb1, emb2)
+        self.assertFalse(np.array_equal(emb1, emb2))
         
         # Вычисляем косинусное сходство
         import math
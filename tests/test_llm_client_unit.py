@@ -0,0 +1,195 @@
+"""
+Unit-тесты LLM клиента без реального API и файлов конфигурации.
+
+Дополняют tests/test_llm_client.py, который требует config/api_keys.yaml
+и живой сервер: здесь сеть замокана, тесты выполняются всегда.
+"""
+
+import json
+import sys
+import os
+import unittest
+from unittest.mock import Mock, patch
+
+# Добавляем путь к src для импорта
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from llm_client import LocalLLMClient
+
+
+def _make_client(**kwargs) -> LocalLLMClient:
+    """Клиент локальной LLM с тестовыми параметрами."""
+    return LocalLLMClient(
+        "localhost", 11434, "qwen3:8b", "Системный промпт", **kwargs
+    )
+
+
+def _ollama_response(content: str) -> Mock:
+    """Ответ Ollama /api/chat с заданным текстом."""
+    response = Mock()
+    response.status_code = 200
+    response.content = json.dumps(
+        {"message": {"content": content}}
+    ).encode('utf-8')
+    return response
+
+
+class TestBatchSend(unittest.TestCase):
+    """Тесты конкурентной отправки независимых промптов."""
+
+    @patch('llm_client.requests.Session.post')
+    def test_batch_send_preserves_order(self, mock_post):
+        """Ответы возвращаются в порядке исходных промптов."""
+
+        def fake_post(url, data=None, timeout=None, **kwargs):
+            payload = json.loads(data)
+            question = payload["messages"][-1]["content"]
+            return _ollama_response(f"ответ: {question}")
+
+        mock_post.side_effect = fake_post
+
+        client = _make_client()
+        answers = client.batch_send(["один", "два", "три"])
+
+        self.assertEqual(answers, ["ответ: один", "ответ: два", "ответ: три"])
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch('llm_client.requests.Session.post')
+    def test_batch_send_does_not_touch_history(self, mock_post):
+        """Батчевые промпты независимы и не попадают в историю."""
+        mock_post.return_value = _ollama_response("ответ")
+
+        client = _make_client()
+        before = client.messages_view
+        client.batch_send(["вопрос"])
+
+        self.assertEqual(client.messages_view, before)
+
+    @patch('llm_client.requests.Session.post')
+    def test_batch_send_empty(self, mock_post):
+        """Пустой список промптов — без единого запроса."""
+        client = _make_client()
+
+        self.assertEqual(client.batch_send([]), [])
+        mock_post.assert_not_called()
+
+
+class TestBatchPrompt(unittest.TestCase):
+    """Тесты упаковки промптов в один запрос с маркерами [[Qi]]/[[Ai]]."""
+
+    @patch('llm_client.requests.Session.post')
+    def test_batch_prompt_parses_markers(self, mock_post):
+        """Ответы разбираются по маркерам [[Ai]] в порядке вопросов."""
+        mock_post.return_value = _ollama_response(
+            "[[A1]] Ответ один\n[[A2]] Ответ два"
+        )
+
+        client = _make_client()
+        answers = client.batch_prompt(["вопрос 1", "вопрос 2"])
+
+        self.assertEqual(answers, ["Ответ один", "Ответ два"])
+        # Весь батч ушёл одним запросом с маркерами вопросов
+        self.assertEqual(mock_post.call_count, 1)
+        payload = json.loads(mock_post.call_args.kwargs.get("data")
+                             or mock_post.call_args[1]["data"])
+        user_msg = payload["messages"][-1]["content"]
+        self.assertIn("[[Q1]] вопрос 1", user_msg)
+        self.assertIn("[[Q2]] вопрос 2", user_msg)
+
+    @patch('llm_client.requests.Session.post')
+    def test_batch_prompt_out_of_order_markers(self, mock_post):
+        """Маркеры в произвольном порядке сопоставляются по номеру."""
+        mock_post.return_value = _ollama_response(
+            "[[A2]] два [[A1]] один"
+        )
+
+        client = _make_client()
+        answers = client.batch_prompt(["в1", "в2"])
+
+        self.assertEqual(answers, ["один", "два"])
+
+    @patch('llm_client.requests.Session.post')
+    def test_batch_prompt_missing_answer_is_empty(self, mock_post):
+        """Пропущенный моделью номер — пустая строка, не сдвиг ответов."""
+        mock_post.return_value = _ollama_response("[[A1]] только первый")
+
+        client = _make_client()
+        answers = client.batch_prompt(["в1", "в2"])
+
+        self.assertEqual(answers, ["только первый", ""])
+
+    def test_batch_prompt_too_many_prompts(self):
+        """Превышение max_batch — ValueError до любого запроса."""
+        client = _make_client()
+
+        with self.assertRaises(ValueError):
+            client.batch_prompt(["q"] * 9, max_batch=8)
+
+    def test_batch_prompt_empty(self):
+        """Пустой список промптов — пустой результат."""
+        self.assertEqual(_make_client().batch_prompt([]), [])
+
+
+class TestHistoryAlignment(unittest.TestCase):
+    """Тесты синхронности _messages, _msg_frags и _msg_tokens.
+
+    Тело запроса собирается склейкой пре-сериализованных фрагментов,
+    поэтому три структуры обязаны оставаться одинаковой длины и
+    поэлементно соответствовать друг другу после любых операций
+    с историей.
+    """
+
+    def _assert_aligned(self, client):
+        """Проверка поэлементного соответствия трёх структур."""
+        self.assertEqual(len(client._messages), len(client._msg_frags))
+        self.assertEqual(len(client._messages), len(client._msg_tokens))
+        for message, frag, tokens in zip(
+                client._messages, client._msg_frags, client._msg_tokens):
+            self.assertEqual(json.loads(frag), message)
+            self.assertEqual(
+                tokens, client._estimate_tokens(message["content"])
+            )
+
+    def test_alignment_survives_trim(self):
+        """Добавление сверх бюджета обрезает все структуры синхронно."""
+        client = _make_client(max_context_tokens=60)
+
+        for i in range(20):
+            client._append_message(
+                "user", f"сообщение номер {i} " + "наполнитель " * 10
+            )
+            self._assert_aligned(client)
+
+        # Окно сработало: история короче числа добавленных сообщений,
+        # системный промпт остался первым
+        self.assertLess(len(client._messages), 21)
+        self.assertEqual(client._messages[0]["role"], "system")
+
+    def test_alignment_after_clear_history(self):
+        """clear_history оставляет структуры согласованными."""
+        client = _make_client()
+        client._append_message("user", "вопрос")
+        client._append_message("assistant", "ответ")
+
+        client.clear_history()
+
+        self._assert_aligned(client)
+        self.assertEqual(len(client._messages), 1)
+        self.assertEqual(client._messages[0]["role"], "system")
+
+    def test_alignment_after_set_system_prompt(self):
+        """set_system_prompt обновляет фрагмент и оценку токенов."""
+        client = _make_client()
+        client._append_message("user", "вопрос")
+
+        client.set_system_prompt("Новый системный промпт подлиннее")
+
+        self._assert_aligned(client)
+        self.assertEqual(
+            client._messages[0]["content"],
+            "Новый системный промпт подлиннее"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -132,6 +132,66 @@ class TestParseToolCall:
         assert result.parameters["ticket_id"] == "TKT-12345"
 
 
+# ============================================================================
+# Unit тесты: parse_tool_calls (несколько блоков за один ход)
+# ============================================================================
+
+class TestParseToolCalls:
+    """Тесты парсинга всех tool_call блоков из ответа LLM."""
+
+    def test_parse_multiple_tool_calls_in_order(self, handler):
+        """Несколько блоков возвращаются в порядке появления."""
+        response = '''
+Создаю тикет и проверяю статус.
+
+<tool_call>
+{"tool": "create_ticket", "parameters": {"author": "Иван"}}
+</tool_call>
+
+<tool_call>
+{"tool": "get_ticket_status", "parameters": {"ticket_id": "TKT-1"}}
+</tool_call>
+'''
+        results = handler.parse_tool_calls(response)
+
+        assert len(results) == 2
+        assert results[0].tool_name == "create_ticket"
+        assert results[0].parameters["author"] == "Иван"
+        assert results[1].tool_name == "get_ticket_status"
+        assert results[1].parameters["ticket_id"] == "TKT-1"
+
+    def test_parse_tool_calls_skips_malformed_block(self, handler):
+        """Некорректный блок пропускается, корректные сохраняются."""
+        response = '''
+<tool_call>
+{invalid json}
+</tool_call>
+
+<tool_call>
+{"tool": "get_ticket_status", "parameters": {"ticket_id": "TKT-2"}}
+</tool_call>
+'''
+        results = handler.parse_tool_calls(response)
+
+        assert len(results) == 1
+        assert results[0].tool_name == "get_ticket_status"
+
+    def test_parse_tool_calls_no_blocks(self, handler):
+        """Ответ без вызовов — пустой список."""
+        assert handler.parse_tool_calls("Привет! Чем могу помочь?") == []
+
+    def test_parse_tool_calls_single_block(self, handler):
+        """Один блок — список из одного запроса."""
+        response = '''<tool_call>
+{"tool": "create_ticket", "parameters": {"theme": "Вход"}}
+</tool_call>'''
+        results = handler.parse_tool_calls(response)
+
+        assert len(results) == 1
+        assert results[0].tool_name == "create_ticket"
+        assert results[0].parameters["theme"] == "Вход"
+
+
 # ============================================================================
 # Unit тесты: has_tool_call
 # ============================================================================
@@ -295,6 +295,43 @@ class TestDocumentRetrieverSearch(unittest.TestCase):
         self.assertEqual(result.source_file, "docs/passwords.md")
         self.assertEqual(result.position, 0)
     
+    def test_search_batch_results_per_query(self):
+        """Батчевый поиск: результаты в порядке исходных запросов."""
+        # По одному эмбедингу на запрос — одним вызовом generate_batch
+        self.mock_generator.generate_batch.return_value = [
+            [1.0, 0.0, 0.0],  # ближе всего chunk_001
+            [0.0, 1.0, 0.0],  # ближе всего chunk_002
+        ]
+
+        retriever = DocumentRetriever(self.embeddings_path, self.mock_generator)
+        batch = retriever.search_batch(["пароль", "установка"], top_k=1)
+
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch[0][0].chunk_id, "chunk_001")
+        self.assertEqual(batch[1][0].chunk_id, "chunk_002")
+        # Эмбединги всех запросов запрошены одним обращением
+        self.mock_generator.generate_batch.assert_called_once_with(
+            ["пароль", "установка"]
+        )
+
+    def test_search_batch_empty_queries(self):
+        """Пустой список запросов — пустой результат без обращений."""
+        retriever = DocumentRetriever(self.embeddings_path, self.mock_generator)
+
+        self.assertEqual(retriever.search_batch([]), [])
+        self.mock_generator.generate_batch.assert_not_called()
+
+    def test_search_batch_top_k(self):
+        """Батчевый поиск уважает top_k для каждого запроса."""
+        self.mock_generator.generate_batch.return_value = [[1.0, 0.0, 0.0]]
+
+        retriever = DocumentRetriever(self.embeddings_path, self.mock_generator)
+        batch = retriever.search_batch(["пароль"], top_k=2)
+
+        self.assertEqual(len(batch), 1)
+        self.assertEqual(len(batch[0]), 2)
+        self.assertIsInstance(batch[0][0], SearchResult)
+
     def test_search_index_not_found(self):
         """Проверка поиска без индекса."""
         retriever = DocumentRetriever("/nonexistent/path.json", self.mock_generator)